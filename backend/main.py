@@ -5,25 +5,99 @@ Using LangChain for RAG pipeline
 
 from fastapi import FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, Response
+from fastapi.responses import StreamingResponse, Response, ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional, Tuple, Iterable, Any, Set
+from typing import List, Optional, Tuple, Iterable, Any, Set, FrozenSet
 import os
 import re
-import requests
-from bs4 import BeautifulSoup
+import sys
 import time
 import xml.etree.ElementTree as ET
 from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate, ChatPromptTemplate
 from pinecone import Pinecone
-from openai import OpenAI
-import json
+try:
+    # gRPC data plane: queries are multiplexed over one long-lived HTTP/2 channel
+    from pinecone.grpc import PineconeGRPC
+except ImportError:  # pinecone installed without the [grpc] extra
+    PineconeGRPC = None
+from openai import AsyncOpenAI
+import orjson
 import asyncio
 import io
-
-app = FastAPI(title="City of Kingston 311 Chatbot API")
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import traceback
+import itertools
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+import httpx
+import numpy as np
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build the network clients once per worker, inside the running event loop:
+    - one pooled HTTP/2 connection pool for all async OpenAI calls (keep-alive, so
+      requests skip the TCP+TLS handshake and streams are multiplexed)
+    - the Pinecone index handle (gRPC when available; resolving the index host is a network call)
+    - a pooled client for official-site pages and the sitemap (dynamic route)
+    - the intent-example embeddings and a Pinecone/answer-chain warm-up, in the background
+    - the optional local language-id model (LANGID_MODEL_PATH)
+    """
+    global async_openai_client, pc_client, index, http_client
+    openai_http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+        ),
+    )
+    # For streams the timeout bounds the initial response and each read, not the whole answer
+    async_openai_client = AsyncOpenAI(
+        api_key=openai_api_key,
+        http_client=openai_http_client,
+        timeout=OPENAI_TIMEOUT_SECONDS,
+        max_retries=OPENAI_MAX_RETRIES,
+    )
+    pc_client = (PineconeGRPC or Pinecone)(api_key=pinecone_api_key)
+    index = pc_client.Index("kingston-policies")
+    print(f"[PINECONE] Using {'gRPC' if PineconeGRPC is not None else 'REST'} index client")
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=15,
+        follow_redirects=True,
+        headers={
+            "User-Agent": "CityOfKingston311Bot/1.0 (+https://www.cityofkingston.ca/)",
+            "Accept": "text/html,application/xhtml+xml",
+        },
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+    app.state.openai = async_openai_client
+    app.state.pinecone_index = index
+    intent_examples_task = asyncio.create_task(load_intent_examples())
+    warm_up_task = asyncio.create_task(warm_up_retrieval())
+    await asyncio.to_thread(_load_language_model)
+    try:
+        yield
+    finally:
+        intent_examples_task.cancel()
+        warm_up_task.cancel()
+        await async_openai_client.close()
+        await http_client.aclose()
+
+
+# JSON bodies are rendered with orjson instead of the stdlib encoder
+app = FastAPI(
+    title="City of Kingston 311 Chatbot API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # CORS middleware for React frontend
 # In production, allow all origins (Vercel will provide the domain)
@@ -59,14 +133,441 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 if not pinecone_api_key or not openai_api_key:
     raise ValueError("PINECONE_API_KEY and OPENAI_API_KEY environment variables must be set")
 
-# Initialize Pinecone and OpenAI clients
-pc_client = Pinecone(api_key=pinecone_api_key)
-index = pc_client.Index("kingston-policies")
-openai_client = OpenAI(api_key=openai_api_key)
+# The Pinecone index and the async OpenAI client used by request handlers are
+# created in `lifespan` at startup.
+pc_client: Any = None
+index: Any = None
+async_openai_client: Optional[AsyncOpenAI] = None
+http_client: Optional[httpx.AsyncClient] = None
+
+# Connection pool size for the async OpenAI client
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+
+# Per-call timeouts (seconds) for external services; a timed-out call is retried once
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "8"))
+OPENAI_EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("OPENAI_EMBEDDING_TIMEOUT_SECONDS", "2"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+PINECONE_TIMEOUT_SECONDS = float(os.getenv("PINECONE_TIMEOUT_SECONDS", "3"))
+DYNAMIC_CONTEXT_TIMEOUT_SECONDS = float(os.getenv("DYNAMIC_CONTEXT_TIMEOUT_SECONDS", "10"))
+
+# Cap concurrent OpenAI calls from request handlers to stay within rate limits
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+_openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
 
 # -------------------------
 # Retrieval helpers (RAG)
 # -------------------------
+def _sse(payload: dict) -> bytes:
+    """Encode one SSE `data:` frame (orjson; StreamingResponse sends bytes as-is)."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+# Stop proxies (nginx/Railway edge) and browsers from buffering or caching the stream,
+# so each frame reaches the client as soon as it is yielded
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+# Text frames are by far the most frequent SSE event; build them without a dict per token.
+_SSE_TEXT_PREFIX = b'data: {"type":"text","content":'
+# The terminal frame never changes; encode it once
+_SSE_DONE = _sse({"type": "done"})
+
+
+def _sse_text(content: str) -> bytes:
+    """SSE text frame, identical to _sse({'type': 'text', 'content': content})."""
+    return _SSE_TEXT_PREFIX + orjson.dumps(content) + b"}\n\n"
+
+
+async def _iter_stream_content(stream: Any):
+    """
+    Yield the non-empty text deltas of an async OpenAI chat completion stream.
+    With stream_options={"include_usage": True} the final chunk carries token usage,
+    logged here to track how much of each prompt was served from the prompt cache.
+    """
+    async for chunk in stream:
+        if chunk.choices:
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached = getattr(details, "cached_tokens", None) or 0
+            print(f"[OPENAI] prompt_tokens={usage.prompt_tokens} cached_tokens={cached} completion_tokens={usage.completion_tokens}")
+
+
+# The RAG stream ends with a self-assessed relevance verdict instead of a second
+# validation call: "[[REL:YES]]" or "[[REL:NO|reason]]". It is stripped before display.
+RELEVANCE_MARKER_INSTRUCTION = (
+    "After your answer, add a final line [[REL:YES]] if the context answered the question, "
+    "or [[REL:NO|one short reason]] if it did not."
+)
+_RELEVANCE_MARKER_START = "[[REL:"
+_RELEVANCE_MARKER_RE = re.compile(r"\[\[REL:(YES|NO)(?:\|([^\]]*))?\]\]", re.IGNORECASE)
+# A malformed or truncated marker ("[[REL:maybe]]", "[[REL:YE"), up to its line end
+_RELEVANCE_MARKER_PARTIAL_RE = re.compile(r"\[\[REL:[^\]\n]*(?:\]\]?)?", re.IGNORECASE)
+
+
+async def _strip_relevance_marker(contents: Any, verdict: dict):
+    """
+    Re-yield text deltas without the trailing relevance marker. Text that could be the
+    start of the marker is held back until it can be decided. Once the source is
+    exhausted, `verdict` is filled with {"is_relevant", "confidence", "reason"}; a
+    missing marker counts as relevant.
+    """
+    held = ""
+    marker_seen = False
+    async for content in contents:
+        held += content
+        if marker_seen:
+            continue
+        start = held.find(_RELEVANCE_MARKER_START)
+        if start >= 0:
+            marker_seen = True
+            if start:
+                yield held[:start]
+            held = held[start:]
+            continue
+        # Keep the longest suffix that is a prefix of the marker
+        keep = 0
+        for n in range(min(len(held), len(_RELEVANCE_MARKER_START) - 1), 0, -1):
+            if _RELEVANCE_MARKER_START.startswith(held[-n:]):
+                keep = n
+                break
+        if len(held) > keep:
+            yield held[: len(held) - keep]
+            held = held[len(held) - keep:]
+
+    match = _RELEVANCE_MARKER_RE.search(held) if marker_seen else None
+    if marker_seen:
+        # Text around the marker (the model may keep writing after it) is still answer text
+        if match is None:
+            rest = _RELEVANCE_MARKER_PARTIAL_RE.sub("", held)
+        else:
+            rest = _RELEVANCE_MARKER_PARTIAL_RE.sub("", held[: match.start()]) + held[match.end():]
+        if rest.strip():
+            yield rest
+    elif held:
+        yield held
+
+    if match is None:
+        verdict.update(is_relevant=True, confidence=0.5, reason="No relevance marker, assuming relevant")
+    elif match.group(1).upper() == "YES":
+        verdict.update(is_relevant=True, confidence=0.9, reason="Answer is relevant")
+    else:
+        verdict.update(
+            is_relevant=False,
+            confidence=0.8,
+            reason=(match.group(2) or "").strip() or "Answer doesn't match question",
+        )
+
+
+# French answers are generated in French in the same streaming call (the sources stay
+# English) rather than generated in English, collected and then translated.
+_FRENCH_ANSWER_INSTRUCTION = " Write your entire answer in French, even though the sources are in English."
+
+
+def _answer_system_prompt(base: str, user_language: str) -> str:
+    """System message for an answer stream in the user's language."""
+    return base + _FRENCH_ANSWER_INSTRUCTION if user_language == "fr" else base
+
+
+# Token deltas are often 1-3 characters; batch them into fewer SSE frames.
+SSE_COALESCE_CHARS = int(os.getenv("SSE_COALESCE_CHARS", "32"))
+SSE_COALESCE_SECONDS = float(os.getenv("SSE_COALESCE_SECONDS", "0.02"))
+
+
+async def _coalesce_stream_content(
+    contents: Any,
+    min_chars: int = SSE_COALESCE_CHARS,
+    max_delay: float = SSE_COALESCE_SECONDS,
+):
+    """
+    Re-yield text deltas joined into larger pieces: a piece is flushed once it
+    reaches `min_chars` or `max_delay` seconds have passed since the last flush.
+    Anything left is flushed when the source is exhausted.
+    """
+    buf: list[str] = []
+    buf_len = 0
+    last_flush = time.monotonic()
+    async for content in contents:
+        buf.append(content)
+        buf_len += len(content)
+        now = time.monotonic()
+        if buf_len >= min_chars or (now - last_flush) >= max_delay:
+            yield "".join(buf)
+            buf.clear()
+            buf_len = 0
+            last_flush = now
+    if buf:
+        yield "".join(buf)
+
+
+# Concurrent query embeddings are coalesced into one API call per window
+EMBEDDING_BATCH_WINDOW_SECONDS = float(os.getenv("EMBEDDING_BATCH_WINDOW_SECONDS", "0.01"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batches query embeddings across requests.
+    - The first text in a window schedules a flush `window` seconds later (sooner once
+      `max_size` texts are waiting); every caller awaits its own future.
+    - One `embeddings.create(input=[...])` call per flush, under the OpenAI semaphore.
+      If a multi-text batch fails, each text is retried on its own, so one bad input
+      (e.g. over the token limit) only fails its own caller. Empty texts are rejected
+      before they join a batch.
+    """
+
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        if not text or not text.strip():
+            raise ValueError("Cannot embed an empty query")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _create(self, texts: list[str]) -> dict[str, np.ndarray]:
+        async with _openai_semaphore:
+            embedding_response = await async_openai_client.embeddings.create(
+                model="text-embedding-3-small",
+                input=texts,
+                timeout=OPENAI_EMBEDDING_TIMEOUT_SECONDS,
+            )
+        return {
+            texts[d.index]: np.asarray(d.embedding, dtype=np.float32)
+            for d in embedding_response.data
+        }
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        results: dict[str, Any] = {}
+        try:
+            results = await self._create(texts)
+        except Exception as e:
+            if len(texts) == 1:
+                results = {texts[0]: e}
+            else:
+                print(f"[EMBED] Batch of {len(texts)} failed ({e!r}), retrying texts one by one")
+                singles = await asyncio.gather(*(self._create([t]) for t in texts), return_exceptions=True)
+                for text, single in zip(texts, singles):
+                    results[text] = single if isinstance(single, BaseException) else single[text]
+        for text, future in batch:
+            if future.done():
+                continue
+            result = results[text]
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+embedding_batcher = EmbeddingBatcher(
+    window=EMBEDDING_BATCH_WINDOW_SECONDS,
+    max_size=EMBEDDING_BATCH_MAX_SIZE,
+)
+
+
+async def _create_query_embedding(text: str) -> np.ndarray:
+    """
+    Embed a query with the async OpenAI client, batched with concurrent requests.
+    Returned as a float32 array (~6KB vs ~43KB of boxed Python floats) so it can go
+    straight into the similarity cache; convert with `.tolist()` only for Pinecone.
+    Repeat queries (same normalized text) are served from `embedding_cache`.
+    """
+    key = _normalize_query(text)
+    cached = embedding_cache.get(key)
+    if cached is not None:
+        return cached
+    embedding = await embedding_batcher.embed(text)
+    # Shared between requests: keep it read-only
+    embedding.setflags(write=False)
+    embedding_cache.put(key, None, embedding)
+    return embedding
+
+
+# -------------------------
+# Answer cache (exact + semantic)
+# -------------------------
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", "0.95"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048"))
+EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_query(query: str) -> str:
+    """Lowercase, trim and collapse whitespace so trivially different queries share a key."""
+    return " ".join((query or "").lower().split())
+
+
+def _query_cache_key(query: str, *scope: Any) -> str:
+    """Hash of the normalized query plus anything else the cached answer depends on."""
+    raw = "|".join([_normalize_query(query), *(str(p) for p in scope)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    Bounded LRU of answered queries with a TTL.
+    - Exact hits are looked up by key (see `_query_cache_key`).
+    - Near-duplicates are found by cosine similarity against the cached query embeddings,
+      which live in one contiguous float32 matrix (one row per slot) so a lookup is a
+      single matrix-vector product.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, similarity_threshold: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, tuple[int, float, Any]]" = OrderedDict()  # key -> (slot, ts, value)
+        self._slot_keys: list[Optional[str]] = [None] * maxsize
+        self._free_slots: list[int] = list(range(maxsize - 1, -1, -1))
+        self._matrix: Optional[np.ndarray] = None  # (maxsize, dim), rows L2-normalized
+        self._valid = np.zeros(maxsize, dtype=bool)
+
+    def _expired(self, ts: float) -> bool:
+        return (time.time() - ts) >= self.ttl
+
+    def _evict(self, key: str) -> None:
+        slot, _, _ = self._entries.pop(key)
+        self._valid[slot] = False
+        self._slot_keys[slot] = None
+        self._free_slots.append(slot)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[1]):
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def get_similar(self, embedding: np.ndarray, accept: Optional[Any] = None) -> Optional[Any]:
+        """
+        Return the most similar cached value with cosine similarity >= threshold.
+        `accept(value) -> bool` can reject candidates (e.g. different category).
+        """
+        if self._matrix is None or not self._valid.any():
+            return None
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if q.shape[0] != self._matrix.shape[1] or norm == 0.0:
+            return None
+        scores = self._matrix @ (q / norm)
+        scores[~self._valid] = -1.0
+        candidates = np.flatnonzero(scores >= self.similarity_threshold)
+        for slot in candidates[np.argsort(-scores[candidates])]:
+            key = self._slot_keys[slot]
+            value = self.get(key) if key is not None else None
+            if value is not None and (accept is None or accept(value)):
+                return value
+        return None
+
+    def put(self, key: str, embedding: Optional[np.ndarray], value: Any) -> None:
+        if key in self._entries:
+            self._evict(key)
+        while len(self._entries) >= self.maxsize:
+            self._evict(next(iter(self._entries)))
+        slot = self._free_slots.pop()
+        if embedding is not None:
+            vec = np.asarray(embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vec))
+            if self._matrix is None:
+                self._matrix = np.zeros((self.maxsize, vec.shape[0]), dtype=np.float32)
+            if norm > 0.0 and vec.shape[0] == self._matrix.shape[1]:
+                self._matrix[slot] = vec / norm
+                self._valid[slot] = True
+        self._slot_keys[slot] = key
+        self._entries[key] = (slot, time.time(), value)
+
+
+query_cache = QueryCache(
+    maxsize=QUERY_CACHE_MAX_ENTRIES,
+    ttl=QUERY_CACHE_TTL_SECONDS,
+    similarity_threshold=QUERY_CACHE_SIMILARITY,
+)
+# Answers streamed by /query/stream, replayed as SSE frames on a hit
+stream_cache = QueryCache(
+    maxsize=QUERY_CACHE_MAX_ENTRIES,
+    ttl=QUERY_CACHE_TTL_SECONDS,
+    similarity_threshold=QUERY_CACHE_SIMILARITY,
+)
+# Results of small LLM side calls (intent classification, translations); exact keys only
+llm_call_cache = QueryCache(
+    maxsize=QUERY_CACHE_MAX_ENTRIES,
+    ttl=QUERY_CACHE_TTL_SECONDS,
+    similarity_threshold=1.0,
+)
+# Query embeddings keyed by the normalized query text; exact keys only
+embedding_cache = QueryCache(
+    maxsize=EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl=EMBEDDING_CACHE_TTL_SECONDS,
+    similarity_threshold=1.0,
+)
+
+
+_CATEGORY_SEPARATOR_RE = re.compile(r"[^a-z0-9]+")
+
+# Boilerplate patterns stripped from retrieved chunks, compiled once at import.
+_RE_BOILERPLATE = re.compile(r"\b(?:Section Menu|Contact Us|City of Kingston|City Hall)\b", re.IGNORECASE)
+_RE_CHEQUE_MAIL_BLOCK = re.compile(
+    r"Make your cheque payable to City of Kingston and mail it to.*?(?=\n\n|\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+_RE_CHEQUE_PO_BOX_BLOCK = re.compile(
+    r"Make your cheque payable.*?PO Box 640.*?(?=\n\n|\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+# Same blocks as they appear in generated answers, in English or French ("Make your
+# cheque payable ... PO Box 640 ... K7L 4X1", "Libellez votre chèque à l'ordre de ...
+# C.P. 640 ... K7L 4X1"): from up to three words before the cheque is mentioned (within
+# the same sentence), through the City's mailing address, to the end of that paragraph.
+_MAILING_BLOCK_LEAD = r"(?:(?:[^\s.!?]|[.!?](?=\S))+[^\S\n]+){0,3}"
+_RE_ANSWER_MAILING_BLOCK = re.compile(
+    _MAILING_BLOCK_LEAD + r"\bch[eè]ques?\b(?:(?!\n\n).)*?"
+    r"(?:K7L\s?4X1|(?:PO Box|P\.O\. Box|C\.\s?P\.|case postale)\s*640)"
+    r"(?:(?!\n\n).)*",
+    re.DOTALL | re.IGNORECASE,
+)
+_RE_ANSWER_MAILING_BLOCK_START = re.compile(r"\bch[eè]ques?\b", re.IGNORECASE)
+# The stream holds back the same lead ("Veuillez libeller votre chèque") plus the word
+# still being generated, since a block may still turn out to start there
+_RE_MAILING_BLOCK_LEAD = re.compile(_MAILING_BLOCK_LEAD + r"\Z")
+_RE_PARTIAL_WORD = re.compile(r"\S*\Z")
+# Runs of spaces/tabs -> " ", three or more newlines -> one blank line (single pass)
+_RE_WHITESPACE_RUNS = re.compile(r"[ \t]+|\n{3,}")
+
+
+def _collapse_whitespace_run(match: re.Match) -> str:
+    return "\n\n" if match.group(0)[0] == "\n" else " "
+
+
+@lru_cache(maxsize=256)
 def _normalize_category(value: str) -> str:
     """
     Normalize categories so metadata like 'Property Tax', 'property-tax', 'property_tax'
@@ -74,10 +575,55 @@ def _normalize_category(value: str) -> str:
     """
     if not value:
         return ""
-    normalized = re.sub(r"[^a-z0-9]+", "_", value.strip().lower())
+    normalized = _CATEGORY_SEPARATOR_RE.sub("_", value.strip().lower())
     return normalized.strip("_")
 
 
+def _strip_mailing_instructions(answer: str) -> str:
+    """Remove cheque / mailing-address instructions (English or French) from a generated answer."""
+    if _RE_ANSWER_MAILING_BLOCK_START.search(answer) is None:
+        return answer
+    return _RE_ANSWER_MAILING_BLOCK.sub("", answer)
+
+
+def _mailing_block_lead(text: str, pos: int) -> int:
+    """Earliest start of a mailing block whose cheque mention begins at `pos` (or in the word ending there)."""
+    window = max(0, pos - 256)
+    word_start = _RE_PARTIAL_WORD.search(text, window, pos).start()
+    return _RE_MAILING_BLOCK_LEAD.search(text, window, word_start).start()
+
+
+async def _strip_mailing_instructions_stream(contents: Any):
+    """
+    Streaming _strip_mailing_instructions: text passes through until a cheque is
+    mentioned; from a few words before it the text is held until the paragraph (or the
+    stream) ends, scrubbed, and released, so a banned block never reaches the client.
+    """
+    held = ""
+    async for content in contents:
+        held += content
+        while held:
+            match = _RE_ANSWER_MAILING_BLOCK_START.search(held)
+            start = _mailing_block_lead(held, len(held) if match is None else match.start())
+            if start:
+                yield held[:start]
+                held = held[start:]
+            if match is None:
+                break
+            paragraph_end = held.find("\n\n")
+            if paragraph_end < 0:
+                break
+            scrubbed = _strip_mailing_instructions(held[:paragraph_end])
+            if scrubbed:
+                yield scrubbed
+            yield "\n\n"
+            held = held[paragraph_end + 2:]
+    if held:
+        held = _strip_mailing_instructions(held)
+        if held:
+            yield held
+
+
 def _clean_retrieved_content(raw: str) -> str:
     """
     Clean common navigation / boilerplate fragments from scraped content.
@@ -89,31 +635,22 @@ def _clean_retrieved_content(raw: str) -> str:
     text = raw
 
     # Remove common nav labels / boilerplate tokens
-    text = re.sub(r"\bSection Menu\b", " ", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bContact Us\b", " ", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bCity of Kingston\b", " ", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bCity Hall\b", " ", text, flags=re.IGNORECASE)
+    text = _RE_BOILERPLATE.sub(" ", text)
 
     # Remove cheque / mailing-address sections if present in scraped text
-    text = re.sub(
-        r"Make your cheque payable to City of Kingston and mail it to.*?(?=\n\n|\Z)",
-        " ",
-        text,
-        flags=re.DOTALL | re.IGNORECASE,
-    )
-    text = re.sub(
-        r"Make your cheque payable.*?PO Box 640.*?(?=\n\n|\Z)",
-        " ",
-        text,
-        flags=re.DOTALL | re.IGNORECASE,
-    )
+    text = _RE_CHEQUE_MAIL_BLOCK.sub(" ", text)
+    text = _RE_CHEQUE_PO_BOX_BLOCK.sub(" ", text)
 
     # Collapse whitespace
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _RE_WHITESPACE_RUNS.sub(_collapse_whitespace_run, text)
     return text.strip()
 
 
+def _intern_str(value: Any) -> Any:
+    """Intern repetitive metadata strings (category/topic) so results share one object."""
+    return sys.intern(value) if type(value) is str else value
+
+
 def _select_context_and_results(
     matches: Iterable[Any],
     expected_category: str,
@@ -126,86 +663,188 @@ def _select_context_and_results(
 
     Key behaviors:
     - Category matching is normalized.
-    - Dedup by source_url so repeated near-duplicates don't crowd out better docs.
+    - Dedup by source_url and by passage text so repeated near-duplicates don't crowd out better docs.
     - Clean common boilerplate rather than dropping entire docs.
     - If category-filtered candidates yield no usable context, fall back to all matches.
     """
     expected_norm = _normalize_category(expected_category)
 
-    def to_item(m: Any) -> dict:
-        md = getattr(m, "metadata", {}) or {}
-        return {
-            "score": getattr(m, "score", 0.0),
-            "raw_content": md.get("content", "") or "",
-            "category": md.get("category", "") or "",
-            "topic": md.get("topic", "") or "",
-            "source_url": md.get("source_url", "") or "",
-            "lastmod": md.get("lastmod") or md.get("updated_at") or md.get("updated") or None,
-        }
-
-    items = [to_item(m) for m in (matches or [])]
-    items.sort(key=lambda x: -(x.get("score") or 0.0))
-
-    def build_from(candidate_items: list[dict]) -> tuple[list[dict], list[str]]:
+    # Columnar view of the matches (one list per field, sorted by score desc).
+    # Per-result dicts are only built for the few items that end up selected.
+    ranked = sorted(
+        ((getattr(m, "score", 0.0), getattr(m, "metadata", {}) or {}) for m in (matches or [])),
+        key=lambda x: -(x[0] or 0.0),
+    )
+    scores: list[float] = []
+    metadatas: list[dict] = []
+    # Indices whose normalized category is the expected one, collected in the same pass
+    filtered: list[int] = []
+    for i, (score, md) in enumerate(ranked):
+        scores.append(score)
+        metadatas.append(md)
+        if not expected_norm or _normalize_category(md.get("category", "") or "") == expected_norm:
+            filtered.append(i)
+    # Cleaned content per index, shared by the filtered pass and the unfiltered fallback
+    cleaned_by_idx: dict[int, str] = {}
+
+    def build_from(candidate_idx: list[int]) -> tuple[list[dict], list[str]]:
         formatted: list[dict] = []
         context: list[str] = []
         seen_urls: Set[str] = set()
+        # The same passage is often indexed under several URLs (or none); send it once
+        seen_snippets: Set[str] = set()
 
         # Consider more than top_k*2 because top results can be boilerplate-heavy
         candidate_limit = max(top_k * 6, 20)
 
-        for item in candidate_items[:candidate_limit]:
-            url = item.get("source_url", "")
+        for i in candidate_idx[:candidate_limit]:
+            md = metadatas[i]
+            url = md.get("source_url", "") or ""
             if url and url in seen_urls:
                 continue
 
-            cleaned = _clean_retrieved_content(item.get("raw_content", ""))
+            cleaned = cleaned_by_idx.get(i)
+            if cleaned is None:
+                cleaned = cleaned_by_idx[i] = _clean_retrieved_content(md.get("content", "") or "")
 
             # Skip tiny / empty chunks after cleaning
             if len(cleaned) < 200:
                 continue
 
+            # One slice for the prompt; the UI snippet is a prefix of it
+            snippet = cleaned[:2000]
+            if snippet in seen_snippets:
+                continue
+            seen_snippets.add(snippet)
             if url:
                 seen_urls.add(url)
 
             formatted.append(
                 {
-                    "score": item.get("score", 0.0),
-                    "content": cleaned[:500],
-                    "category": item.get("category", ""),
-                    "topic": item.get("topic", ""),
+                    "score": scores[i],
+                    "content": snippet[:500],
+                    "category": _intern_str(md.get("category", "") or ""),
+                    "topic": _intern_str(md.get("topic", "") or ""),
                     "source_url": url,
-                    "lastmod": item.get("lastmod"),
+                    "lastmod": md.get("lastmod") or md.get("updated_at") or md.get("updated") or None,
                 }
             )
-            context.append(cleaned[:2000])
+            context.append(snippet)
 
             if len(context) >= top_k:
                 break
 
         return formatted, context
 
-    # First try: only expected category (normalized)
-    if expected_norm:
-        filtered = [
-            it for it in items if _normalize_category(it.get("category", "")) == expected_norm
-        ]
-    else:
-        filtered = items
+    all_idx = list(range(len(ranked)))
 
+    # First try: only expected category (normalized)
     formatted_results, context_parts = build_from(filtered)
 
     # Fallback: if filtering produced no usable context, try unfiltered
-    if not context_parts:
-        formatted_results, context_parts = build_from(items)
+    # (pointless when the filter kept every match)
+    if not context_parts and len(filtered) < len(all_idx):
+        formatted_results, context_parts = build_from(all_idx)
 
     return formatted_results, context_parts
 
 
+def _prompt_context(formatted_results: list[dict], context_parts: list[str]) -> str:
+    """
+    Join context chunks for the prompt in canonical source_url order (stable for chunks
+    without a URL), so the same retrieved set always yields a byte-identical prompt and
+    the provider's prefix cache can reuse it. `formatted_results` stays in score order.
+    """
+    order = sorted(
+        range(len(context_parts)),
+        key=lambda i: formatted_results[i].get("source_url", "") if i < len(formatted_results) else "",
+    )
+    return "\n\n".join(context_parts[i] for i in order)
+
+
+# Categories we know are stored in Pinecone metadata (possibly spelled differently)
+PINECONE_FILTER_CATEGORIES: Set[str] = {
+    "parking",
+    "property_tax",
+    "waste_collection",
+    "hazardous_waste",
+    "fire_permits",
+    "noise",
+}
+
+
+@lru_cache(maxsize=32)
+def _category_filter_values(category: str) -> tuple[str, ...]:
+    """
+    Spellings of a normalized category as they may appear in metadata
+    ('property_tax' -> 'property_tax', 'property-tax', 'property tax', 'Property Tax', ...),
+    for an `$in` filter evaluated by Pinecone.
+    """
+    words = " ".join(category.split("_"))
+    return tuple(dict.fromkeys([category, category.replace("_", "-"), words, words.title(), words.capitalize()]))
+
+
+async def _query_index(**kwargs: Any) -> Any:
+    """
+    index.query in a worker thread, bounded by PINECONE_TIMEOUT_SECONDS and retried once.
+    Raises asyncio.TimeoutError if both attempts time out.
+    """
+    for attempt in range(2):
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(index.query, **kwargs), PINECONE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            if attempt:
+                raise
+            print(f"[PINECONE] Query timed out after {PINECONE_TIMEOUT_SECONDS}s, retrying")
+
+
+async def _retrieve_context(
+    query_embedding: np.ndarray,
+    category: str,
+    top_k: int,
+) -> tuple[list[dict], list[str]]:
+    """
+    Query Pinecone with the category filter pushed down to the index, so only
+    matching vectors come back (top_k*2 instead of over-fetching top_k*3 and
+    filtering here). Falls back to an unfiltered query when the filtered one
+    yields no usable context.
+    """
+    vector = query_embedding.tolist()
+    category_norm = _normalize_category(category)
+    if category_norm in PINECONE_FILTER_CATEGORIES:
+        results = await _query_index(
+            vector=vector,
+            top_k=top_k * 2,
+            include_metadata=True,
+            filter={"category": {"$in": list(_category_filter_values(category_norm))}},
+        )
+        print(f"[PINECONE] Filtered ({category_norm}) query returned {len(results.matches)} matches")
+        # Already filtered server-side, so skip the local category filter
+        formatted_results, context_parts = _select_context_and_results(
+            results.matches,
+            expected_category="",
+            top_k=top_k,
+        )
+        if context_parts:
+            return formatted_results, context_parts
+
+    results = await _query_index(
+        vector=vector,
+        top_k=top_k * 2,
+        include_metadata=True,
+    )
+    print(f"[PINECONE] Unfiltered query returned {len(results.matches)} matches")
+    return _select_context_and_results(
+        results.matches,
+        expected_category=category,
+        top_k=top_k,
+    )
+
+
 # -------------------------
 # Dynamic (official-site) search helpers
 # -------------------------
-ALLOWED_DYNAMIC_DOMAINS: Set[str] = {
+ALLOWED_DYNAMIC_DOMAINS: FrozenSet[str] = frozenset({
     "cityofkingston.ca",
     "www.cityofkingston.ca",
     "mycity.cityofkingston.ca",
@@ -236,7 +875,12 @@ ALLOWED_DYNAMIC_DOMAINS: Set[str] = {
     # Tourism (City-affiliated)
     "visitkingston.ca",
     "www.visitkingston.ca",
-}
+})
+# "scheme://host/" prefixes for the allowed hosts: the common case is a plain
+# string-prefix check, urlparse is only needed for unusual URLs (ports, case, no path)
+_ALLOWED_URL_PREFIXES: Tuple[str, ...] = tuple(
+    f"{scheme}://{host}/" for host in sorted(ALLOWED_DYNAMIC_DOMAINS) for scheme in ("https", "http")
+)
 
 CURATED_DYNAMIC_SOURCES: dict = {
     # Transportation/operations pages that can change frequently
@@ -290,9 +934,24 @@ CURATED_DYNAMIC_SOURCES: dict = {
     "weather": [],
 }
 
-_SITEMAP_CACHE: dict = {"ts": 0.0, "items": []}  # {ts: float, items: list[dict]}
+# {ts: float, items: list[dict], latest: {substring: [url]}, lastmod_by_url: {url: lastmod}}
+# `latest` and `lastmod_by_url` are derived from `items` once per refresh.
+_SITEMAP_CACHE: dict = {"ts": 0.0, "items": []}
 SITEMAP_TTL_SECONDS = int(os.getenv("SITEMAP_TTL_SECONDS", "3600"))
 SITEMAP_URL = os.getenv("SITEMAP_URL", "https://www.cityofkingston.ca/sitemap.xml")
+_SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+_SITEMAP_URL_TAG = _SITEMAP_NS + "url"
+_SITEMAP_LOC_TAG = _SITEMAP_NS + "loc"
+_SITEMAP_LASTMOD_TAG = _SITEMAP_NS + "lastmod"
+# URL substrings select_dynamic_sources asks _pick_latest for (precomputed per refresh)
+_SITEMAP_LATEST_PATTERNS = (
+    "/news/posts/weekly-traffic-report-",
+    "/news/posts/traffic-report",
+    "/news/posts/kingston-transit-service-alert",
+    "/news-and-notices/transit-news/",
+    "/news/posts/winter-parking",
+    "/news/posts/winter-services-response-plan",
+)
 
 # If Pinecone docs are missing source URLs, we still want at least one official link per answer
 # (except greetings), so the UI can render "Official Sources" consistently.
@@ -323,6 +982,8 @@ CATEGORY_OFFICIAL_FALLBACK_URLS: dict = {
 
 
 def _is_allowed_domain(url: str) -> bool:
+    if url.startswith(_ALLOWED_URL_PREFIXES):
+        return True
     try:
         from urllib.parse import urlparse
 
@@ -332,6 +993,32 @@ def _is_allowed_domain(url: str) -> bool:
         return False
 
 
+def _substring_re(*terms: str) -> re.Pattern:
+    """One compiled alternation that matches if any term occurs as a substring."""
+    return re.compile("|".join(re.escape(t) for t in terms))
+
+
+# Dynamic-bucket keyword tables (plain substring semantics, one scan per bucket)
+_TIME_HINT_RE = _substring_re("today", "tomorrow", "now", "right now", "current", "latest", "updated")
+_ROAD_CLOSURE_RE = _substring_re(
+    # Common road closures phrasing + typos seen in real user input
+    "road closure", "road closures", "road closed", "lane closed", "closure", "traffic",
+    "detour", "construction", "road work", "roadwork", "blocked", "road blocked", "blockage",
+    # Catch frequent misspellings like "contruction" / "constuction"
+    "contruc", "constuc", "construc",
+)
+_SNOW_RE = _substring_re("snow", "snow removal", "plow", "plowing", "winter maintenance", "winter")
+_TRANSIT_RE = _substring_re("transit", "bus", "kingston transit")
+_LOST_PHRASE_RE = re.compile(
+    _substring_re("lost and found", "lost my", "lost wallet", "lost phone", "lost item", "lost it").pattern
+    # or generic "lost" (e.g., "I lost it on the bus")
+    + r"|\blost\b"
+)
+_LOST_ITEM_RE = _substring_re("wallet", "phone", "purse", "bag", "id", "keys", "item")
+_TRANSIT_UPDATE_RE = _substring_re("route", "detour", "delay", "delayed", "cancelled", "canceled")
+
+
+@lru_cache(maxsize=1024)
 def classify_dynamic_bucket(query: str) -> Optional[str]:
     """
     Prototype-only routing: dynamic = fast-changing operational info.
@@ -339,50 +1026,27 @@ def classify_dynamic_bucket(query: str) -> Optional[str]:
     """
     q = (query or "").lower()
 
-    # Time-sensitive hint + road-ish wording should still be treated as dynamic
-    time_hint = any(k in q for k in ["today", "tomorrow", "now", "right now", "current", "latest", "updated"])
-
-    # Common road closures phrasing + typos seen in real user input
-    road_terms = [
-        "road closure",
-        "road closures",
-        "road closed",
-        "lane closed",
-        "closure",
-        "traffic",
-        "detour",
-        "construction",
-        "road work",
-        "roadwork",
-        "blocked",
-        "road blocked",
-        "blockage",
-    ]
-
-    # Catch frequent misspellings like "contruction" / "constuction"
-    construction_typos = any(k in q for k in ["contruc", "constuc", "construc"])
-
-    if any(k in q for k in road_terms) or (time_hint and "road" in q) or construction_typos:
+    if (
+        _ROAD_CLOSURE_RE.search(q)
+        # Time-sensitive hint + road-ish wording should still be treated as dynamic
+        or ("road" in q and _TIME_HINT_RE.search(q))
+    ):
         return "road_closures"
 
-    if any(k in q for k in ["snow", "snow removal", "plow", "plowing", "winter maintenance", "winter"]):
+    if _SNOW_RE.search(q):
         return "snow_removal"
 
     # Transit lost & found (common real-world question; official site is kingstontransit.ca)
-    if any(k in q for k in ["transit", "bus", "kingston transit"]) and (
-        # common phrasings
-        any(k in q for k in ["lost and found", "lost my", "lost wallet", "lost phone", "lost item", "lost it"])
-        # or generic "lost" (e.g., "I lost it on the bus")
-        or re.search(r"\blost\b", q) is not None
-    ):
+    is_transit = _TRANSIT_RE.search(q) is not None
+    if is_transit and _LOST_PHRASE_RE.search(q):
         return "transit_lost_found"
 
     # Generic lost item (wallet/phone/etc.) without specifying the service:
     # don't send "policy KB" fallback; ask one clarifying question + provide official links.
-    if "lost" in q and any(k in q for k in ["wallet", "phone", "purse", "bag", "id", "keys", "item"]):
+    if "lost" in q and _LOST_ITEM_RE.search(q):
         return "lost_found_general"
 
-    if any(k in q for k in ["transit", "bus", "kingston transit", "route", "detour", "delay", "delayed", "cancelled", "canceled"]):
+    if is_transit or _TRANSIT_UPDATE_RE.search(q):
         return "transit"
 
     if "weather" in q:
@@ -399,30 +1063,161 @@ def is_dynamic_query(query: str) -> bool:
     return classify_dynamic_bucket(query) is not None
 
 
-def _http_get(url: str) -> str:
-    headers = {
-        "User-Agent": "CityOfKingston311Bot/1.0 (+https://www.cityofkingston.ca/)",
-        "Accept": "text/html,application/xhtml+xml",
-    }
-    resp = requests.get(url, headers=headers, timeout=15)
+# -------------------------
+# On-disk page cache (official-site pages + sitemap)
+# -------------------------
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "kingston311_pages.sqlite3"))
+# News/notice pages change often; other official pages are revalidated daily
+PAGE_CACHE_NEWS_TTL_SECONDS = int(os.getenv("PAGE_CACHE_NEWS_TTL_SECONDS", "3600"))
+PAGE_CACHE_TTL_SECONDS = int(os.getenv("PAGE_CACHE_TTL_SECONDS", "86400"))
+# Pages fetched for time-sensitive questions (closures, transit alerts, snow, weather) are
+# only served from disk for a few minutes, then revalidated with a conditional GET
+PAGE_CACHE_DYNAMIC_TTL_SECONDS = int(os.getenv("PAGE_CACHE_DYNAMIC_TTL_SECONDS", "300"))
+
+
+class PageCache:
+    """
+    URL -> (body, etag, last_modified, fetched_at) in SQLite, so fetched pages survive
+    restarts and are shared by workers on the same host. Any SQLite error disables the
+    cache for this process; fetching itself never depends on it.
+    The public methods are async: SQLite calls (which can wait up to the 1s busy
+    timeout, and write whole sitemap bodies) run in a worker thread on one shared
+    connection, serialized by a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._disabled:
+            try:
+                conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS pages ("
+                    "url TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, "
+                    "last_modified TEXT, fetched_at REAL NOT NULL)"
+                )
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"[PAGE CACHE] Disabled ({self.path}): {e}")
+                self._disabled = True
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple) -> Optional[tuple]:
+        """Run one statement and commit (blocking); returns the first row, if any."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(sql, params).fetchone()
+                conn.commit()
+                return row
+            except sqlite3.Error as e:
+                print(f"[PAGE CACHE] Disabled after error: {e}")
+                self._disabled = True
+                self._conn = None
+                return None
+
+    async def get(self, url: str) -> Optional[tuple[str, Optional[str], Optional[str], float]]:
+        if self._disabled:
+            return None
+        return await asyncio.to_thread(
+            self._execute, "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+        )
+
+    async def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        if self._disabled:
+            return
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO pages (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, body, etag, last_modified, time.time()),
+        )
+
+    async def touch(self, url: str) -> None:
+        if self._disabled:
+            return
+        await asyncio.to_thread(self._execute, "UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+
+page_cache = PageCache(PAGE_CACHE_PATH)
+
+
+async def _http_get(url: str, max_age: Optional[float] = None) -> str:
+    """
+    GET a page through the disk cache: fresh entries (younger than `max_age`) are served
+    locally, stale ones are revalidated with If-None-Match / If-Modified-Since.
+    """
+    if max_age is None:
+        max_age = PAGE_CACHE_NEWS_TTL_SECONDS if "/news" in url else PAGE_CACHE_TTL_SECONDS
+
+    entry = await page_cache.get(url)
+    headers: dict = {}
+    if entry is not None:
+        body, etag, last_modified, fetched_at = entry
+        if time.time() - fetched_at < max_age:
+            return body
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    resp = await http_client.get(url, headers=headers)
+    if resp.status_code == 304 and entry is not None:
+        await page_cache.touch(url)
+        return entry[0]
     resp.raise_for_status()
+    await page_cache.put(url, resp.text, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
     return resp.text
 
 
-def extract_page_text(html: str) -> str:
+def extract_page_text_and_title(html: str) -> tuple[str, str]:
     """
-    Extract readable text from an HTML page and aggressively remove nav/boilerplate.
+    Parse an HTML page once (lxml) and return (readable text, <title> text).
+    Nav/boilerplate is aggressively removed from the text.
     """
     if not html:
-        return ""
-    soup = BeautifulSoup(html, "html.parser")
+        return "", ""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
     for tag in soup(["script", "style", "noscript"]):
         tag.decompose()
     text = soup.get_text("\n", strip=True)
-    return _clean_retrieved_content(text)
+    return _clean_retrieved_content(text), title.strip()
+
+
+def _parse_sitemap(xml_text: str) -> tuple[list[dict], dict[str, list[str]], dict]:
+    """Sitemap XML -> (items, latest-URL index, {url: lastmod}); runs in a worker thread."""
+    items: list[dict] = []
+    # Stream <url> elements and clear each one once read, so the full tree is never
+    # held in memory and off-domain URLs are dropped as they are parsed.
+    for _, url_el in ET.iterparse(io.BytesIO(xml_text.encode("utf-8")), events=("end",)):
+        if url_el.tag != _SITEMAP_URL_TAG:
+            continue
+        loc = (url_el.findtext(_SITEMAP_LOC_TAG) or "").strip()
+        if loc and _is_allowed_domain(loc):
+            lastmod_el = url_el.find(_SITEMAP_LASTMOD_TAG)
+            items.append(
+                {
+                    "loc": loc,
+                    # Lowercased once here instead of on every query in _sitemap_item_score
+                    "loc_lower": loc.lower(),
+                    "lastmod": (lastmod_el.text or "").strip() if lastmod_el is not None else None,
+                }
+            )
+        url_el.clear()
+    return items, _build_latest_index(items), _sitemap_lastmod_lookup(items)
 
 
-def _fetch_sitemap_items() -> list[dict]:
+async def _fetch_sitemap_items() -> list[dict]:
     """
     Fetch the City's sitemap and return:
     [{"loc": str, "lastmod": str|None}]
@@ -433,24 +1228,11 @@ def _fetch_sitemap_items() -> list[dict]:
         return _SITEMAP_CACHE["items"]
 
     try:
-        xml_text = _http_get(SITEMAP_URL)
-        root = ET.fromstring(xml_text)
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        items: list[dict] = []
-        for url_el in root.findall("sm:url", ns):
-            loc_el = url_el.find("sm:loc", ns)
-            lastmod_el = url_el.find("sm:lastmod", ns)
-            loc = (loc_el.text or "").strip() if loc_el is not None else ""
-            if not loc:
-                continue
-            if not _is_allowed_domain(loc):
-                continue
-            items.append(
-                {
-                    "loc": loc,
-                    "lastmod": (lastmod_el.text or "").strip() if lastmod_el is not None else None,
-                }
-            )
+        xml_text = await _http_get(SITEMAP_URL, max_age=SITEMAP_TTL_SECONDS)
+        # Parsing tens of thousands of entries is CPU-bound: keep it off the event loop
+        items, latest, lastmod_by_url = await asyncio.to_thread(_parse_sitemap, xml_text)
+        _SITEMAP_CACHE["latest"] = latest
+        _SITEMAP_CACHE["lastmod_by_url"] = lastmod_by_url
         _SITEMAP_CACHE["ts"] = now
         _SITEMAP_CACHE["items"] = items
         return items
@@ -459,10 +1241,35 @@ def _fetch_sitemap_items() -> list[dict]:
         return []
 
 
+def _build_latest_index(items: list[dict]) -> dict[str, list[str]]:
+    """
+    One pass over the sitemap: {substring: unique URLs, newest lastmod first} for
+    every entry in _SITEMAP_LATEST_PATTERNS.
+    """
+    grouped: dict[str, list[dict]] = {sub: [] for sub in _SITEMAP_LATEST_PATTERNS}
+    for it in items:
+        loc = it.get("loc") or ""
+        for sub in _SITEMAP_LATEST_PATTERNS:
+            if sub in loc:
+                grouped[sub].append(it)
+
+    index: dict[str, list[str]] = {}
+    for sub, matches in grouped.items():
+        matches.sort(key=lambda it: it.get("lastmod") or "", reverse=True)
+        index[sub] = list(dict.fromkeys(it["loc"] for it in matches if it.get("loc")))
+    return index
+
+
 def _pick_latest(items: list[dict], url_substring: str, limit: int = 3) -> list[str]:
     """
     Pick latest URLs matching substring, ordered by lastmod desc when available.
+    Served from the per-refresh index when `items` is the cached sitemap.
     """
+    if items is _SITEMAP_CACHE["items"]:
+        latest = _SITEMAP_CACHE.get("latest") or {}
+        if url_substring in latest:
+            return latest[url_substring][:limit]
+
     matches = [it for it in items if url_substring in (it.get("loc") or "")]
 
     def key(it: dict) -> str:
@@ -470,9 +1277,11 @@ def _pick_latest(items: list[dict], url_substring: str, limit: int = 3) -> list[
 
     matches.sort(key=key, reverse=True)
     urls: list[str] = []
+    seen: Set[str] = set()
     for it in matches:
         loc = it.get("loc") or ""
-        if loc and loc not in urls:
+        if loc and loc not in seen:
+            seen.add(loc)
             urls.append(loc)
         if len(urls) >= limit:
             break
@@ -483,6 +1292,8 @@ def _sitemap_lastmod_lookup(items: list[dict]) -> dict:
     """
     Build {url: lastmod} map from sitemap items.
     """
+    if items and items is _SITEMAP_CACHE["items"] and "lastmod_by_url" in _SITEMAP_CACHE:
+        return _SITEMAP_CACHE["lastmod_by_url"]
     out: dict = {}
     for it in items or []:
         loc = (it.get("loc") or "").strip()
@@ -504,7 +1315,7 @@ def _sitemap_lastmod_lookup(items: list[dict]) -> dict:
     return out
 
 
-def _annotate_results_lastmod(results: list[dict]) -> list[dict]:
+async def _annotate_results_lastmod(results: list[dict]) -> list[dict]:
     """
     Add `lastmod` for cityofkingston.ca URLs using the City sitemap (cached).
     This gives a meaningful "last updated" date instead of vague "checked today".
@@ -513,7 +1324,7 @@ def _annotate_results_lastmod(results: list[dict]) -> list[dict]:
         return results
 
     try:
-        items = _fetch_sitemap_items()
+        items = await _fetch_sitemap_items()
         lastmod_by_url = _sitemap_lastmod_lookup(items)
     except Exception:
         lastmod_by_url = {}
@@ -537,10 +1348,14 @@ def _annotate_results_lastmod(results: list[dict]) -> list[dict]:
     return results
 
 
+_QUERY_MATCH_STRIP_RE = re.compile(r"[^a-z0-9\s-]+")
+_WHITESPACE_RUN_RE = re.compile(r"\s+")
+
+
 def _tokenize_query_for_match(query: str) -> list[str]:
     q = (query or "").lower()
-    q = re.sub(r"[^a-z0-9\s-]+", " ", q)
-    q = re.sub(r"\s+", " ", q).strip()
+    q = _QUERY_MATCH_STRIP_RE.sub(" ", q)
+    q = _WHITESPACE_RUN_RE.sub(" ", q).strip()
     stop = {
         "the",
         "a",
@@ -584,7 +1399,7 @@ def _sitemap_item_score(item: dict, tokens: list[str]) -> float:
     - Token matches in URL path get points
     - lastmod (when present) provides a small recency boost
     """
-    loc = (item.get("loc") or "").lower()
+    loc = item.get("loc_lower") or (item.get("loc") or "").lower()
     if not loc:
         return 0.0
 
@@ -632,15 +1447,64 @@ def _search_sitemap(items: list[dict], query: str, include_prefixes: list[str],
     return out
 
 
-def select_dynamic_sources(bucket: Optional[str], query: str, max_results: int = 6) -> list[dict]:
+# Embeddings of dynamic-source candidates (title + URL slug), reused across queries
+_SOURCE_EMBEDDINGS: "OrderedDict[str, np.ndarray]" = OrderedDict()  # rows L2-normalized
+_SOURCE_EMBEDDINGS_MAX = 4096
+
+
+def _source_semantic_text(source: dict) -> str:
+    """What a candidate page is about: its title (unless a placeholder) plus the URL slug."""
+    url = source.get("url") or ""
+    path = url.split("://", 1)[-1].partition("/")[2]
+    slug = " ".join(path.replace("-", " ").replace("_", " ").split("/")).strip()
+    title = (source.get("title") or "").strip()
+    if title and title.lower() != "official update":
+        return f"{title} {slug}".strip()
+    return slug or url
+
+
+async def _rank_sources_by_similarity(sources: list[dict], query_embedding: np.ndarray, limit: int) -> list[dict]:
+    """
+    Keep the `limit` candidates whose title/slug is most similar to the query.
+    Unseen candidates are embedded in one (micro-batched) round-trip and cached.
+    """
+    texts = [_source_semantic_text(src) for src in sources]
+    missing = [t for t in dict.fromkeys(texts) if t not in _SOURCE_EMBEDDINGS]
+    if missing:
+        vectors = await asyncio.gather(*(embedding_batcher.embed(t) for t in missing))
+        for text, vec in zip(missing, vectors):
+            norm = float(np.linalg.norm(vec))
+            _SOURCE_EMBEDDINGS[text] = vec / norm if norm else vec
+            while len(_SOURCE_EMBEDDINGS) > _SOURCE_EMBEDDINGS_MAX:
+                _SOURCE_EMBEDDINGS.popitem(last=False)
+
+    matrix = np.stack([_SOURCE_EMBEDDINGS[t] for t in texts])
+    q = np.asarray(query_embedding, dtype=np.float32)
+    scores = matrix @ (q / (float(np.linalg.norm(q)) or 1.0))
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [sources[i] for i in top]
+
+
+async def select_dynamic_sources(
+    bucket: Optional[str],
+    query: str,
+    max_results: int = 6,
+    query_embedding: Optional[np.ndarray] = None,
+) -> list[dict]:
     """
     Combine curated seed pages + most recent relevant pages from the City's sitemap.
     Only returns URLs from allowed domains.
+    With `query_embedding`, surplus candidates are cut by semantic similarity to the
+    query instead of by list position (keyword > latest > curated).
     """
     bucket = bucket or classify_dynamic_bucket(query)
-    base = list(CURATED_DYNAMIC_SOURCES.get(bucket, []) if bucket else [])
+    if bucket is None:
+        # Every candidate list below is keyed by bucket: nothing to select, skip the sitemap
+        return []
+    base = list(CURATED_DYNAMIC_SOURCES.get(bucket, []))
 
-    items = _fetch_sitemap_items()
+    items = await _fetch_sitemap_items()
     lastmod_by_url = _sitemap_lastmod_lookup(items)
     extra_urls: list[str] = []
     keyword_urls: list[str] = []
@@ -710,45 +1574,66 @@ def select_dynamic_sources(bucket: Optional[str], query: str, max_results: int =
     for s in base:
         add(s.get("title", ""), s.get("url", ""))
 
+    if query_embedding is not None and len(out) > max_results > 0:
+        try:
+            return await _rank_sources_by_similarity(out, query_embedding, max_results)
+        except Exception as e:
+            print(f"[DYNAMIC SEARCH] Semantic ranking skipped: {e}")
+
     return out[:max_results]
 
 
-def build_dynamic_context(query: str, max_results: int = 4) -> tuple[list[dict], str]:
+async def _fetch_page_text(url: str) -> tuple[str, str]:
+    """
+    Fetch a dynamic-source page and extract (text, title); HTML parsing runs in a worker thread.
+    Uses the short dynamic TTL: these pages answer "what is happening now" questions.
+    """
+    html = await _http_get(url, max_age=PAGE_CACHE_DYNAMIC_TTL_SECONDS)
+    return await asyncio.to_thread(extract_page_text_and_title, html)
+
+
+async def build_dynamic_context(
+    query: str,
+    max_results: int = 4,
+    query_embedding: Optional[np.ndarray] = None,
+) -> tuple[list[dict], str]:
     """
     Returns (sources, context_text).
     context_text is formatted with per-source blocks so the model can cite them.
+    Pages are fetched concurrently; blocks keep the order (and numbering) of `sources`.
     """
     bucket = classify_dynamic_bucket(query)
-    sources = select_dynamic_sources(bucket, query, max_results=max_results)
+    sources = await select_dynamic_sources(bucket, query, max_results=max_results, query_embedding=query_embedding)
     if not sources:
         return [], ""
 
+    candidates = [
+        (idx, src)
+        for idx, src in enumerate(sources, start=1)
+        if src.get("url", "") and _is_allowed_domain(src.get("url", ""))
+    ]
+    pages = await asyncio.gather(
+        *(_fetch_page_text(src["url"]) for _, src in candidates),
+        return_exceptions=True,
+    )
+
     context_blocks: list[str] = []
     usable_sources: list[dict] = []
 
-    for idx, src in enumerate(sources, start=1):
-        url = src.get("url", "")
-        if not url:
-            continue
-        if not _is_allowed_domain(url):
-            continue
+    for (idx, src), page in zip(candidates, pages):
+        url = src["url"]
         try:
-            html = _http_get(url)
-            page_text = extract_page_text(html)
+            if isinstance(page, BaseException):
+                raise page
+            page_text, html_title = page
             if len(page_text) < 300:
                 continue
             snippet = page_text[:3500]
             title = (src.get("title") or "").strip()
-            if title.lower() == "official update":
-                # Try to improve placeholder titles from the HTML <title>
-                try:
-                    soup = BeautifulSoup(html, "html.parser")
-                    html_title = (soup.title.get_text(" ", strip=True) if soup.title else "").strip()
-                    if html_title:
-                        title = html_title[:120]
-                        src["title"] = title
-                except Exception:
-                    pass
+            if title.lower() == "official update" and html_title:
+                # Improve placeholder titles from the HTML <title>
+                title = html_title[:120]
+                src["title"] = title
 
             header = f"[{idx}] {title or 'Official source'}\nURL: {url}\n"
             context_blocks.append(f"{header}\n{snippet}")
@@ -763,25 +1648,91 @@ def build_dynamic_context(query: str, max_results: int = 4) -> tuple[list[dict],
     return usable_sources, "\n\n".join(context_blocks).strip()
 
 
-def _ensure_official_links_for_category(formatted_results: list[dict], category: str) -> list[dict]:
+async def _await_dynamic_context(
+    query: str,
+    query_embedding: Optional[np.ndarray],
+    max_results: int = 4,
+) -> tuple[list[dict], str]:
     """
-    Ensure at least one result has a source_url for the UI, by adding a category fallback link
-    when Pinecone metadata lacks URLs.
+    build_dynamic_context, giving up (no sources) after DYNAMIC_CONTEXT_TIMEOUT_SECONDS
+    so the caller's fallback message runs.
     """
-    if formatted_results and any((r.get("source_url") or "").strip() for r in formatted_results):
-        return formatted_results
+    try:
+        return await asyncio.wait_for(
+            build_dynamic_context(query, max_results=max_results, query_embedding=query_embedding),
+            DYNAMIC_CONTEXT_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        print(f"[DYNAMIC SEARCH] Timed out after {DYNAMIC_CONTEXT_TIMEOUT_SECONDS}s")
+        return [], ""
 
-    fallbacks = CATEGORY_OFFICIAL_FALLBACK_URLS.get(category) or []
-    if not fallbacks:
-        return formatted_results
 
-    existing_urls = {((r.get("source_url") or "").strip()) for r in (formatted_results or []) if r.get("source_url")}
-    for title, url in fallbacks:
-        if url not in existing_urls:
-            return [
-                {
-                    "score": 1.0,
-                    "content": title,
+# Official-site answers (dynamic route and both RAG fallbacks) share one system prompt and
+# one template; the question and sources come last so the prompt prefix stays identical.
+_DYNAMIC_SYSTEM_PROMPT = "You answer only from provided sources and include citations."
+_DYNAMIC_PROMPT_TEMPLATE = """You are the City of Kingston 311 assistant.
+Answer the user's question using ONLY the official sources provided below.
+
+Rules:
+1) If the sources do not contain the answer, say: "I couldn't confirm that on official City of Kingston sources."
+2) Do NOT guess. Do NOT use outside knowledge.
+3) Include citations like [1], [2] matching the source numbers.
+4) Keep the answer clear and practical.
+5) Do not add extra sections like "Official links" — citations [1], [2] are enough.
+
+Question: {question}
+
+Official sources:
+{context}
+"""
+
+
+async def _stream_dynamic_answer(question: str, dyn_context: str, user_language: str):
+    """Stream an answer grounded only in official-site context, as SSE text frames."""
+    async with _openai_semaphore:
+        stream = await async_openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": _answer_system_prompt(_DYNAMIC_SYSTEM_PROMPT, user_language)},
+                {"role": "user", "content": _DYNAMIC_PROMPT_TEMPLATE.format(question=question, context=dyn_context)},
+            ],
+            temperature=0.1,
+            max_tokens=700,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+    async for content in _coalesce_stream_content(_iter_stream_content(stream)):
+        yield _sse_text(content)
+
+
+def _dynamic_source_results(sources: list[dict]) -> list[dict]:
+    """UI `results` entries for official-site sources."""
+    return [
+        {"score": 1.0, "content": s.get("title", ""), "category": "dynamic_search", "topic": "official_search", "source_url": s.get("url", ""), "lastmod": s.get("lastmod")}
+        for s in sources
+        if s.get("url")
+    ]
+
+
+def _ensure_official_links_for_category(formatted_results: list[dict], category: str) -> list[dict]:
+    """
+    Ensure at least one result has a source_url for the UI, by adding a category fallback link
+    when Pinecone metadata lacks URLs.
+    """
+    if formatted_results and any((r.get("source_url") or "").strip() for r in formatted_results):
+        return formatted_results
+
+    fallbacks = CATEGORY_OFFICIAL_FALLBACK_URLS.get(category) or []
+    if not fallbacks:
+        return formatted_results
+
+    existing_urls = {((r.get("source_url") or "").strip()) for r in (formatted_results or []) if r.get("source_url")}
+    for title, url in fallbacks:
+        if url not in existing_urls:
+            return [
+                {
+                    "score": 1.0,
+                    "content": title,
                     "category": category,
                     "topic": category,
                     "source_url": url,
@@ -795,24 +1746,28 @@ llm = ChatOpenAI(
     model="gpt-4o-mini",
     temperature=0.2,
     openai_api_key=openai_api_key,
+    timeout=OPENAI_TIMEOUT_SECONDS,
+    max_retries=OPENAI_MAX_RETRIES,
     max_tokens=800,  # Allow comprehensive answers
     streaming=True  # Enable streaming
 )
 
-# Create custom prompt template - Simple RAG: provide complete information from database
-def get_prompt_template(category: str) -> str:
-    """Get prompt template - Simple RAG that provides complete information"""
-    
-    # Only add collection calendar info for waste_collection questions
-    if category == "waste_collection":
-        schedule_instruction = """
+_SCHEDULE_INSTRUCTION = """
 For schedule/collection questions ("when", "what day", "pickup", "collection day"):
 - START with: "[Collection type] occurs on designated days as per the waste collection calendar."
 - THEN add: All relevant schedule facts from context
 - END WITH: "To find your specific collection day, enter your address at https://www.cityofkingston.ca/garbage-and-recycling/collection-calendar/"
 """
-    else:
-        schedule_instruction = ""
+
+
+# Create custom prompt template - Simple RAG: provide complete information from database
+# Prompts and chains depend only on the category, so they are built once per category.
+@lru_cache(maxsize=16)
+def get_system_prompt(category: str) -> str:
+    """Get the category-specific instructions (everything before the context block)"""
+    
+    # Only add collection calendar info for waste_collection questions
+    schedule_instruction = _SCHEDULE_INSTRUCTION if category == "waste_collection" else ""
     
     return f"""You are a helpful assistant for the City of Kingston 311 service. Answer the user's question using ONLY the information provided in the context below.
 
@@ -826,9 +1781,29 @@ CRITICAL RULES:
 7. If the context doesn't contain the answer, say: "I don't have that specific information. Please contact 311 at 613-546-0000."
 8. DO NOT include mailing address information (PO Box 640, Kingston, ON K7L 4X1) or instructions about making cheques payable - omit this information completely
 
-{schedule_instruction}
+{schedule_instruction}"""
+
 
-Context from City of Kingston ({category}):
+@lru_cache(maxsize=16)
+def get_stream_system_prompt(category: str) -> str:
+    """
+    System message for the streaming RAG answer: every static instruction for the
+    category, so the message is byte-identical across requests and forms the prefix
+    that OpenAI's automatic prompt caching can reuse.
+    """
+    return (
+        "You are a helpful assistant for the City of Kingston 311 service. Do not include mailing address "
+        "information (PO Box 640) or cheque payment instructions in your responses. "
+        + RELEVANCE_MARKER_INSTRUCTION
+        + "\n\n"
+        + get_system_prompt(category)
+    )
+
+
+@lru_cache(maxsize=16)
+def get_prompt_template(category: str) -> str:
+    """Get the per-request part of the RAG prompt (context + question); rules live in the system message"""
+    return f"""Context from City of Kingston ({category}):
 {{context}}
 
 Question: {{question}}
@@ -836,47 +1811,276 @@ Question: {{question}}
 Answer (use the context above to provide a complete answer):"""
 
 # Create LLM chain factory - creates chain with category-specific prompt
+@lru_cache(maxsize=16)
 def create_llm_chain(category: str):
-    """Create LLM chain with category-specific prompt"""
-    template = get_prompt_template(category)
-    prompt = PromptTemplate(
-        template=template,
-        input_variables=["context", "question"]
-    )
+    """
+    Create LLM chain with category-specific prompt.
+    The context is sent as its own turn and acknowledged by a primed assistant turn
+    before the question; this keeps the model from replying that context is missing
+    without needing a second "strict" generation.
+    """
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", get_system_prompt(category)),
+        ("human", f"Context from City of Kingston ({category}):\n{{context}}"),
+        ("ai", "Understood. I will answer using only the information in this context."),
+        ("human", "{question}"),
+    ])
     return prompt | llm
 
 
-def extract_address(query: str) -> Optional[str]:
-    """Extract address from query if present"""
-    # Look for patterns like "my address is X" or "address: X" or just an address
-    patterns = [
+# Terms that must not appear in answers for a given category (waste_collection is
+# allowed some overlap, so it is not listed). One alternation per category, matched as
+# whole words (plurals included) so "wastewater" or "taxi" do not count.
+_UNRELATED_CATEGORY_TERMS: dict = {
+    "parking": ["garbage", "waste", "collection calendar", "recycling"],
+    "property_tax": ["garbage", "waste", "parking", "collection"],
+    "hazardous_waste": ["parking", "tax", "collection calendar"],
+    "fire_permits": ["garbage", "parking", "tax"],
+    "noise": ["garbage", "parking", "tax", "collection"],
+}
+_UNRELATED_CATEGORY_RE = {
+    cat: re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")(?:e?s)?\b", re.IGNORECASE)
+    for cat, terms in _UNRELATED_CATEGORY_TERMS.items()
+}
+
+
+def _build_strict_llm_chain(category: str):
+    """Chain used to regenerate an answer that drifted into unrelated categories"""
+    topic = category.replace('_', ' ')
+    strict_template = f"""Answer ONLY about {topic}. Do NOT mention garbage, waste collection, parking permits, property tax, or any other topics.
+
+Context:
+{{context}}
+
+Question: {{question}}
+
+Answer (ONLY {topic}):"""
+    strict_prompt = PromptTemplate(template=strict_template, input_variables=["context", "question"])
+    return strict_prompt | llm
+
+
+_STRICT_LLM_CHAINS = {cat: _build_strict_llm_chain(cat) for cat in _UNRELATED_CATEGORY_TERMS}
+
+# Answers mentioning any of these (as substrings) get an application link appended
+_FORM_KEYWORDS_RE = re.compile("form|application|apply|submit", re.IGNORECASE)
+
+# Sentences end at a terminator followed by whitespace, so the dots inside URLs,
+# domains and decimals do not split them. The captured whitespace stays with the
+# preceding sentence, so kept text is unchanged.
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])(\s+)")
+# If post-filtering leaves less than this, fall back to a strict regeneration
+_MIN_FILTERED_ANSWER_CHARS = 120
+
+
+def _strip_unrelated_sentences(answer: str, category: str) -> str:
+    """
+    Drop sentences that mention topics unrelated to `category`.
+    Returns the answer unchanged when nothing matches.
+    """
+    forbidden_re = _UNRELATED_CATEGORY_RE.get(category)
+    if forbidden_re is None or not forbidden_re.search(answer):
+        return answer
+    lines: list[str] = []
+    for line in answer.splitlines(keepends=True):
+        body = line.rstrip("\n")
+        if not forbidden_re.search(body):
+            lines.append(line)
+            continue
+        parts = _SENTENCE_SPLIT_RE.split(body)
+        sentences = ("".join(parts[i:i + 2]) for i in range(0, len(parts), 2))
+        kept = "".join(s for s in sentences if not forbidden_re.search(s)).rstrip()
+        # Drop the whole line (bullet, heading, ...) when nothing on it survives
+        if kept:
+            lines.append(kept + line[len(body):])
+    return "".join(lines).strip()
+
+
+# Address / classification patterns are compiled once at import time; these run on
+# every /query and /query/stream request before any I/O.
+_ADDRESS_HINT_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
         r"my address is (.+)",
         r"address is (.+)",
         r"address: (.+)",
         r"at (.+?)(?:\.|$)",
-    ]
-    
+    )
+]
+# Address patterns only start at the first digit of a number ((?<!\d)) and cap the
+# street-name run, so a long or adversarial query cannot drive quadratic backtracking.
+_ADDRESS_MAX_STREET_CHARS = 60
+_STREET_ADDRESS_RE = re.compile(
+    r"(?<!\d)\d+\s+\w+\s+(street|st|avenue|ave|road|rd|drive|dr|lane|ln|boulevard|blvd|way|court|ct)"
+)
+_ADDRESS_CLEAN_PHRASES_RE = re.compile(r"(check for|look up|find|my address is|address is|address:)")
+_ADDRESS_EXTRACT_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"((?<!\d)\d+\s+[\w\s]{1,%d}(?:street|st|avenue|ave|road|rd|drive|dr|lane|ln|boulevard|blvd|way|court|ct))"
+        % _ADDRESS_MAX_STREET_CHARS,
+        r"((?<!\d)\d+\s+division(?:\s+st(?:reet)?)?)",
+        r"((?<!\d)\d+\s+[\w]+(?:\s+division)?)",
+    )
+]
+_DIGITS_RE = re.compile(r"\d+")
+_TRAILING_PUNCT_RE = re.compile(r"[.,;!?]+$")
+
+
+def extract_address(query: str) -> Optional[str]:
+    """Extract address from query if present"""
+    # Look for patterns like "my address is X" or "address: X" or just an address
     query_lower = query.lower()
-    for pattern in patterns:
-        match = re.search(pattern, query_lower, re.IGNORECASE)
+    for pattern in _ADDRESS_HINT_PATTERNS:
+        match = pattern.search(query_lower)
         if match:
             address = match.group(1).strip()
             # Remove trailing punctuation
-            address = re.sub(r'[.,;!?]+$', '', address)
+            address = _TRAILING_PUNCT_RE.sub('', address)
             if len(address) > 5:  # Basic validation
                 return address
     return None
 
-def classify_question_intent_ai(query: str) -> Tuple[str, str]:
+# -------------------------
+# Embedding intent classifier
+# -------------------------
+# Example questions per (intent_type, category). A query takes the label of its nearest
+# example by cosine similarity on the query embedding already computed for retrieval;
+# below INTENT_EMBEDDING_MIN_SCORE the LLM classifier decides instead.
+_INTENT_EXAMPLES: dict[tuple[str, str], tuple[str, ...]] = {
+    ("live_status_lookup", "waste_collection"): (
+        "When is my garbage day?",
+        "What day is my recycling picked up?",
+        "When does my green bin get collected?",
+        "What is the collection schedule for my street?",
+    ),
+    ("policy_explanatory", "parking"): (
+        "How do I get a residential parking permit?",
+        "How much is a monthly parking permit?",
+        "What are the on-street parking rules?",
+        "Can I park on the street overnight?",
+    ),
+    ("policy_explanatory", "property_tax"): (
+        "When are property taxes due?",
+        "How do I pay my property tax bill?",
+        "What happens if I pay my taxes late?",
+        "How is my property tax calculated?",
+    ),
+    ("policy_explanatory", "waste_collection"): (
+        "What goes in the blue box?",
+        "Can I put pizza boxes in the green bin?",
+        "What items are accepted in the grey box?",
+        "How many garbage bags can I put out?",
+    ),
+    ("policy_explanatory", "hazardous_waste"): (
+        "Where can I drop off household hazardous waste?",
+        "How do I dispose of old batteries?",
+        "Where do I take leftover paint?",
+        "What are the KARC hazardous waste hours?",
+    ),
+    ("policy_explanatory", "fire_permits"): (
+        "Do I need a fire permit for a backyard fire pit?",
+        "Is open air burning allowed?",
+        "How do I get a burn permit?",
+    ),
+    ("policy_explanatory", "noise"): (
+        "What are the quiet hours in Kingston?",
+        "How do I make a noise complaint?",
+        "What does the noise bylaw allow?",
+    ),
+    ("out_of_scope", "none"): (
+        "What's the weather like today?",
+        "Can you recommend a good restaurant?",
+        "Who won the hockey game last night?",
+        "Help me write an essay.",
+    ),
+}
+INTENT_EMBEDDING_MIN_SCORE = float(os.getenv("INTENT_EMBEDDING_MIN_SCORE", "0.6"))
+_intent_example_matrix: Optional[np.ndarray] = None  # (n_examples, dim), rows L2-normalized
+_intent_example_labels: list[tuple[str, str]] = []
+
+
+async def load_intent_examples() -> None:
+    """Embed the intent examples once (at startup); on failure the LLM classifier is used."""
+    global _intent_example_matrix, _intent_example_labels
+    labels = [label for label, examples in _INTENT_EXAMPLES.items() for _ in examples]
+    texts = [text for examples in _INTENT_EXAMPLES.values() for text in examples]
+    try:
+        async with _openai_semaphore:
+            response = await async_openai_client.embeddings.create(model="text-embedding-3-small", input=texts)
+        matrix = np.asarray([d.embedding for d in response.data], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        _intent_example_labels = labels
+        _intent_example_matrix = matrix
+        print(f"[AGENT 1] Loaded {len(texts)} intent examples")
+    except Exception as e:
+        print(f"[AGENT 1] Could not embed intent examples, using LLM classification: {e}")
+
+
+async def warm_up_retrieval() -> None:
     """
-    AGENT 1: Use AI to understand and classify the question.
-    This prevents misclassification of unrelated questions.
-    Returns: (intent_type, category)
+    Pay one-time costs at startup instead of on the first requests: build the
+    per-category answer chains and open the Pinecone channel (gRPC connects lazily).
     """
+    for category in {category for _, category in _INTENT_EXAMPLES if category != "none"}:
+        create_llm_chain(category)
     try:
-        classification_prompt = f"""Analyze this question and classify it into ONE category. Be very careful - only classify if it's clearly about City of Kingston services.
+        await asyncio.wait_for(asyncio.to_thread(index.describe_index_stats), timeout=PINECONE_TIMEOUT_SECONDS)
+        print("[PINECONE] Connection warmed up")
+    except Exception as e:
+        print(f"[PINECONE] Warm-up failed, first query will connect: {e!r}")
+
+
+def classify_intent_from_embedding(query_embedding: np.ndarray) -> Optional[Tuple[str, str]]:
+    """Nearest intent example for the query embedding, or None if nothing is close enough."""
+    if _intent_example_matrix is None:
+        return None
+    q = np.asarray(query_embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(q))
+    if q.shape[0] != _intent_example_matrix.shape[1] or norm == 0.0:
+        return None
+    scores = _intent_example_matrix @ (q / norm)
+    best = int(np.argmax(scores))
+    print(f"[AGENT 1] Nearest intent example: {_intent_example_labels[best]} ({scores[best]:.2f})")
+    if scores[best] < INTENT_EMBEDDING_MIN_SCORE:
+        return None
+    return _intent_example_labels[best]
+
+
+async def _classify_request(query: str, embedding_task: Optional[asyncio.Task]) -> Tuple[str, str]:
+    """
+    Intent from the query embedding when it is close to an example, else from the
+    keyword rules; the LLM classifier is only called when neither decides.
+    """
+    intent = await _intent_from_embedding_task(embedding_task) or _classify_by_keywords(query)
+    if intent is not None:
+        return intent
+    return await classify_question_intent(query)
 
-Question: "{query}"
+
+async def _embedding_or_none(embedding_task: Optional[asyncio.Task]) -> Optional[np.ndarray]:
+    """Result of the query-embedding task, or None if it failed (for optional uses)."""
+    if embedding_task is None:
+        return None
+    try:
+        return await embedding_task
+    except Exception as e:
+        print(f"[EMBED] Query embedding unavailable: {e}")
+        return None
+
+
+async def _intent_from_embedding_task(embedding_task: Optional[asyncio.Task]) -> Optional[Tuple[str, str]]:
+    """Wait for the query embedding and classify from it; errors surface later at retrieval."""
+    query_embedding = await _embedding_or_none(embedding_task)
+    if query_embedding is None:
+        return None
+    return classify_intent_from_embedding(query_embedding)
+
+
+# Static instructions go first and byte-identical on every call (prompt-prefix caching);
+# only the question itself varies.
+_CLASSIFICATION_INSTRUCTIONS = """You are a classification system. Respond with ONLY the category in format: intent_type|category
+
+Analyze the user's question and classify it into ONE category. Be very careful - only classify if it's clearly about City of Kingston services.
 
 Categories:
 - live_status_lookup + waste_collection: Questions about WHEN garbage/recycling is collected, collection schedules, "what day is my pickup"
@@ -893,16 +2097,29 @@ Example: "policy_explanatory|parking" or "out_of_scope|none"
 
 If the question is clearly NOT about City of Kingston services, respond with "out_of_scope|none"
 """
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a classification system. Respond with ONLY the category in format: intent_type|category"},
-                {"role": "user", "content": classification_prompt}
-            ],
-            temperature=0.1,
-            max_tokens=50
-        )
+
+
+async def classify_question_intent_ai(query: str) -> Tuple[str, str]:
+    """
+    AGENT 1: Use AI to understand and classify the question.
+    This prevents misclassification of unrelated questions.
+    Returns: (intent_type, category)
+    """
+    cache_key = "intent|" + query
+    cached = llm_call_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    try:
+        async with _openai_semaphore:
+            response = await async_openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _CLASSIFICATION_INSTRUCTIONS},
+                    {"role": "user", "content": f'Question: "{query}"'}
+                ],
+                temperature=0.1,
+                max_tokens=50
+            )
         
         result = response.choices[0].message.content.strip().lower()
         print(f"[AGENT 1] Classification result: {result}")
@@ -913,9 +2130,11 @@ If the question is clearly NOT about City of Kingston services, respond with "ou
             category = category.strip()
             
             if intent_type == "out_of_scope" or category == "none":
-                return ("out_of_scope", "none")
-            
-            return (intent_type, category)
+                label = ("out_of_scope", "none")
+            else:
+                label = (intent_type, category)
+            llm_call_cache.put(cache_key, None, label)
+            return label
         
         # Fallback to old method if AI fails
         return classify_question_intent_fallback(query)
@@ -924,97 +2143,119 @@ If the question is clearly NOT about City of Kingston services, respond with "ou
         print(f"[AGENT 1] Error in AI classification: {e}")
         return classify_question_intent_fallback(query)
 
-def classify_question_intent_fallback(query: str) -> Tuple[str, str]:
-    """
-    Fallback classification using keyword matching (less accurate but reliable)
-    """
+# Keyword classifier tables. Each category's keywords are folded into one compiled
+# alternation so a query is scanned once instead of once per keyword.
+_LIVE_KEYWORDS_RE = re.compile(
+    "|".join(
+        re.escape(k)
+        for k in (
+            "when is my", "when does my", "what day is my",
+            "my collection day", "my pickup day",
+            "check my collection", "find my collection",
+        )
+    )
+)
+
+# Ordered by priority: when several categories match, the earliest one wins.
+_POLICY_CATEGORY_KEYWORDS: list[tuple[str, tuple[str, ...]]] = [
+    ("parking", ("parking permit", "parking", "permit", "monthly parking", "residential parking")),
+    ("property_tax", ("property tax", "tax payment", "tax due", "tax bill", "pay taxes")),
+    ("waste_collection", ("blue box", "grey box", "green bin", "what goes", "recycling", "garbage", "waste", "cart", "collection rules")),
+    ("hazardous_waste", ("hazardous waste", "karc", "dispose", "batteries", "drop off")),
+    ("fire_permits", ("fire permit", "open air fire", "burn", "fire pit")),
+    ("noise", ("noise", "quiet hours", "bylaw", "nuisance", "complaint")),
+]
+# One compiled alternation per category, tried in priority order so the scan stops at
+# the first category that matches.
+_POLICY_CATEGORY_RES: tuple[tuple[str, re.Pattern], ...] = tuple(
+    (cat, re.compile("|".join(re.escape(t) for t in terms)))
+    for cat, terms in _POLICY_CATEGORY_KEYWORDS
+)
+
+
+@lru_cache(maxsize=1024)
+def _classify_by_keywords(query: str) -> Optional[Tuple[str, str]]:
+    """Keyword classification, or None when no rule matches."""
     query_lower = query.lower()
     
-    # Live lookup indicators (schedule questions) - be more specific
-    live_keywords = [
-        "when is my", "when does my", "what day is my", 
-        "my collection day", "my pickup day",
-        "check my collection", "find my collection"
-    ]
-    
-    # Address patterns - be more strict
-    address_patterns = [
-        r"\d+\s+\w+\s+(street|st|avenue|ave|road|rd|drive|dr|lane|ln|boulevard|blvd|way|court|ct)",
-    ]
-    
     # Check for live lookup - must have both address pattern AND collection keywords
-    has_address = any(re.search(pattern, query_lower) for pattern in address_patterns)
-    has_collection_keyword = any(keyword in query_lower for keyword in live_keywords) or ("collection" in query_lower and "day" in query_lower)
+    has_address = _STREET_ADDRESS_RE.search(query_lower) is not None
+    has_collection_keyword = _LIVE_KEYWORDS_RE.search(query_lower) is not None or ("collection" in query_lower and "day" in query_lower)
     
     if has_address and has_collection_keyword:
         return ("live_status_lookup", "waste_collection")
     
     # Policy question - classify into specific category
-    if any(term in query_lower for term in ["parking permit", "parking", "permit", "monthly parking", "residential parking"]):
-        return ("policy_explanatory", "parking")
-    
-    if any(term in query_lower for term in ["property tax", "tax payment", "tax due", "tax bill", "pay taxes"]):
-        return ("policy_explanatory", "property_tax")
-    
-    if any(term in query_lower for term in ["blue box", "grey box", "green bin", "what goes", "recycling", "garbage", "waste", "cart", "collection rules"]):
-        return ("policy_explanatory", "waste_collection")
-    
-    if any(term in query_lower for term in ["hazardous waste", "karc", "dispose", "batteries", "drop off"]):
-        return ("policy_explanatory", "hazardous_waste")
-    
-    if any(term in query_lower for term in ["fire permit", "open air fire", "burn", "fire pit"]):
-        return ("policy_explanatory", "fire_permits")
-    
-    if any(term in query_lower for term in ["noise", "quiet hours", "bylaw", "nuisance", "complaint"]):
-        return ("policy_explanatory", "noise")
-    
+    for cat, pattern in _POLICY_CATEGORY_RES:
+        if pattern.search(query_lower):
+            return ("policy_explanatory", cat)
+    return None
+
+
+def classify_question_intent_fallback(query: str) -> Tuple[str, str]:
+    """
+    Fallback classification using keyword matching (less accurate but reliable)
+    """
     # Default - but this should rarely happen with AI classification
-    return ("policy_explanatory", "waste_collection")
+    return _classify_by_keywords(query) or ("policy_explanatory", "waste_collection")
 
-def classify_question_intent(query: str) -> Tuple[str, str]:
+async def classify_question_intent(query: str) -> Tuple[str, str]:
     """Main classification function - uses AI first, falls back to keyword matching"""
-    return classify_question_intent_ai(query)
+    return await classify_question_intent_ai(query)
+
+# Only detect EXACT greetings - be very strict
+_EXACT_GREETINGS = frozenset({
+    "hi", "hello", "hey",
+    "good morning", "good afternoon", "good evening",
+    "how are you", "what can you do", "what do you do",
+    "what is this", "who are you", "introduce yourself",
+})
+# Greeting equals the query or is followed by a space / "?" / "!"
+_GREETING_PREFIX_RE = re.compile(
+    "(?:" + "|".join(re.escape(g) for g in _EXACT_GREETINGS) + r")(?:$|[ ?!])"
+)
+_GREETING_QUESTION_WORDS_RE = re.compile(
+    "with|about|for|when|where|how|what|why|can i|do i|should i"
+)
+# Simple acknowledgment patterns (only if they're the whole query)
+_SIMPLE_ACK_PREFIX_RE = re.compile(
+    "thanks|thank you|ok|okay|got it|understood|that's helpful|that helps"
+)
+
 
 def is_greeting_or_simple_query(query: str) -> bool:
     """Detect if query is a greeting or simple interaction that doesn't need additional information"""
     query_lower = query.lower().strip()
     
-    # Only detect EXACT greetings - be very strict
-    exact_greetings = [
-        "hi", "hello", "hey", 
-        "good morning", "good afternoon", "good evening",
-        "how are you", "what can you do", "what do you do",
-        "what is this", "who are you", "introduce yourself"
-    ]
-    
-    # Simple acknowledgment patterns (only if they're the whole query)
-    simple_patterns = [
-        "thanks", "thank you", "ok", "okay", "got it", "understood",
-        "that's helpful", "that helps"
-    ]
-    
     # Check if it's EXACTLY a greeting (starts with or equals)
-    if any(query_lower == pattern or query_lower.startswith(pattern + " ") or query_lower.startswith(pattern + "?") or query_lower.startswith(pattern + "!") for pattern in exact_greetings):
+    if query_lower in _EXACT_GREETINGS or _GREETING_PREFIX_RE.match(query_lower):
         # But exclude if it's a question about something (e.g., "help with parking" is NOT a greeting)
-        if any(word in query_lower for word in ["with", "about", "for", "when", "where", "how", "what", "why", "can i", "do i", "should i"]):
+        if _GREETING_QUESTION_WORDS_RE.search(query_lower):
             # This is a question, not a greeting
             return False
         return True
     
     # Check for simple acknowledgments (only if it's the whole query or very short)
     if len(query_lower.split()) <= 4:
-        if any(query_lower == pattern or query_lower.startswith(pattern) for pattern in simple_patterns):
+        if _SIMPLE_ACK_PREFIX_RE.match(query_lower):
             return True
     
     return False
 
-def translate_text(text: str, target_language: str, source_language: str = "auto") -> str:
+async def translate_text(text: str, target_language: str, source_language: str = "auto") -> str:
     """
     Translate text using OpenAI.
     target_language: "en" or "fr"
+    Successful translations are memoized, so the fixed UI strings (greeting, fallbacks,
+    correction) cost one call per worker and TTL rather than one per French request.
     """
     if target_language == "en" and source_language == "en":
         return text  # No translation needed
+
+    cache_key = f"tr|{source_language}|{target_language}|{text}"
+    cached = llm_call_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
         # Map language codes to full names for better results
@@ -1031,84 +2272,157 @@ def translate_text(text: str, target_language: str, source_language: str = "auto
         else:
             prompt = f"Translate the following text from {source_lang_name} to {target_lang_name}. Only return the translation, nothing else:\n\n{text}"
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": f"You are a professional translator. Translate accurately and naturally to {target_lang_name}."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1000
-        )
+        async with _openai_semaphore:
+            response = await async_openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": f"You are a professional translator. Translate accurately and naturally to {target_lang_name}."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.2,
+                max_tokens=1000
+            )
         
         translated = response.choices[0].message.content.strip()
         print(f"[TRANSLATE] {source_language} -> {target_language}: {text[:50]}... -> {translated[:50]}...")
+        llm_call_cache.put(cache_key, None, translated)
         return translated
         
     except Exception as e:
         print(f"[TRANSLATE] Error translating: {e}")
-        return text  # Return original on error
+        return text  # Return original on error (not cached)
+
+_FRENCH_INDICATORS = ("le", "la", "les", "de", "du", "des", "et", "est", "pour", "avec", "dans", "sur", "par", "que", "qui", "quoi", "comment", "où", "quand", "pourquoi")
+# Whole-word French markers; an ASCII query containing none of them is treated as English
+_FRENCH_HINT_WORDS = frozenset(_FRENCH_INDICATORS) | frozenset({
+    "je", "tu", "il", "elle", "nous", "vous", "ils", "elles", "un", "une", "au", "aux",
+    "mon", "ma", "mes", "ton", "ta", "tes", "son", "sa", "ses", "ce", "cet", "cette", "ces",
+    "ou", "ne", "pas", "en", "y", "quel", "quelle", "quels", "quelles", "peux", "puis",
+    "bonjour", "salut", "merci", "svp",
+    # City-service nouns users type without articles or accents ("permis stationnement")
+    "permis", "stationnement", "collecte", "ordures", "dechets", "recyclage", "poubelle",
+    "poubelles", "taxe", "fonciere", "bruit", "ville", "horaire", "horaires", "incendie",
+})
+_WORD_RE = re.compile(r"\w+")
+# Elided clitics ("j'ai", "l'horaire", "qu'est-ce", "n'est") each count as a French marker;
+# the leading \b keeps English contractions ("don't", "it's") out
+_FRENCH_ELISION_RE = re.compile(r"\b(?:[jldnscmt]|qu)['’]\w")
+_FRENCH_ACCENT_RE = re.compile(r"[àâæçéèêëîïôœùûüÿ]")
+# English function words; outnumbering the French markers, they outweigh an accent
+# ("Can I open a café patio?", "Naïve question about parking")
+_ENGLISH_HINT_WORDS = frozenset({
+    "the", "a", "an", "is", "are", "can", "do", "does", "i", "my", "to", "of", "for",
+    "how", "what", "where", "when", "in", "on", "at", "and", "about", "with", "this",
+    "that", "it", "you", "your", "from", "there", "have", "has", "get", "not",
+})
+
+# Optional local language-id model (fastText lid.176.ftz / lid.176.bin). When unset or
+# unavailable, detection falls back to the keyword heuristic below.
+LANGID_MODEL_PATH = os.getenv("LANGID_MODEL_PATH", "").strip()
+_lang_model = None
+
+
+def _load_language_model() -> None:
+    """Load the fastText language-id model once per worker, if configured."""
+    global _lang_model
+    if not LANGID_MODEL_PATH or _lang_model is not None:
+        return
+    try:
+        import fasttext
 
+        _lang_model = fasttext.load_model(LANGID_MODEL_PATH)
+        print(f"[DETECT] Loaded language-id model: {LANGID_MODEL_PATH}")
+    except Exception as e:
+        print(f"[DETECT] Language-id model unavailable, using keyword heuristic: {e}")
+
+
+def _detect_language_heuristic(text_lower: str) -> str:
+    """Whole-word French markers or French accents -> 'fr', otherwise 'en'."""
+    words = _WORD_RE.findall(text_lower)
+    hits = sum(1 for word in words if word in _FRENCH_HINT_WORDS)
+    hits += len(_FRENCH_ELISION_RE.findall(text_lower))
+    if hits >= 2:
+        return "fr"
+    # Accents are a strong signal on their own ("Stationnement résidentiel"), unless the
+    # sentence is plainly English around a borrowed word
+    if _FRENCH_ACCENT_RE.search(text_lower):
+        english = sum(1 for word in words if word in _ENGLISH_HINT_WORDS)
+        return "fr" if english <= hits else "en"
+    # One marker is enough for very short queries ("bonjour", "merci!")
+    if hits == 1 and len(words) <= 2:
+        return "fr"
+    return "en"
+
+
+@lru_cache(maxsize=4096)
 def detect_language(text: str) -> str:
     """
     Detect language of text. Returns "en" or "fr"
     """
     try:
-        # Quick keyword-based detection (faster than AI)
         text_lower = text.lower()
-        french_indicators = ["le", "la", "les", "de", "du", "des", "et", "est", "pour", "avec", "dans", "sur", "par", "que", "qui", "quoi", "comment", "où", "quand", "pourquoi"]
-        french_count = sum(1 for word in french_indicators if word in text_lower)
-        
-        if french_count >= 2:
-            return "fr"
-        
-        # Use AI for more accurate detection if needed
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a language detector. Respond with ONLY 'en' or 'fr'."},
-                {"role": "user", "content": f"What language is this text? Respond with ONLY 'en' or 'fr':\n\n{text[:200]}"}
-            ],
-            temperature=0.1,
-            max_tokens=10
-        )
-        
-        detected = response.choices[0].message.content.strip().lower()
-        if detected in ["en", "fr"]:
-            return detected
-        
-        return "en"  # Default to English
-        
+
+        # Confidently English: no accents, elisions or French words at all
+        if (
+            text.isascii()
+            and _FRENCH_HINT_WORDS.isdisjoint(_WORD_RE.findall(text_lower))
+            and _FRENCH_ELISION_RE.search(text_lower) is None
+        ):
+            return "en"
+
+        if _lang_model is not None:
+            labels, _ = _lang_model.predict(text[:500].replace("\n", " "), k=1)
+            return "fr" if labels and labels[0] == "__label__fr" else "en"
+
+        return _detect_language_heuristic(text_lower)
+
     except Exception as e:
         print(f"[DETECT] Error detecting language: {e}")
         return "en"  # Default to English
 
-def check_context_relevance(question: str, context_sample: str, expected_category: str) -> bool:
+# Question words ignored when extracting key terms for the context relevance check
+_KEY_TERM_STOPWORDS = frozenset({"what", "when", "where", "how", "why", "can", "the", "and", "for", "with", "about"})
+# Three 4-character key terms plus two separators
+_MIN_REJECTABLE_QUESTION_CHARS = 3 * 4 + 2
+
+# A retrieved chunk this similar to the query is relevant without the keyword check
+CONTEXT_RELEVANCE_MIN_SCORE = float(os.getenv("CONTEXT_RELEVANCE_MIN_SCORE", "0.5"))
+
+
+def check_context_relevance(
+    question: str,
+    context_sample: str,
+    expected_category: str,
+    best_score: Optional[float] = None,
+) -> bool:
     """
     Quick check if context is relevant before generating answer.
     Returns True if context seems relevant, False otherwise.
+    `best_score` is the top Pinecone similarity for the query embedding; when it clears
+    CONTEXT_RELEVANCE_MIN_SCORE the keyword scan is skipped.
     """
     try:
-        # Quick keyword check first (faster)
-        question_lower = question.lower()
-        context_lower = context_sample.lower()
-        
-        # Extract key terms from question
-        key_terms = []
-        for word in question_lower.split():
-            if len(word) > 3 and word not in ["what", "when", "where", "how", "why", "can", "the", "and", "for", "with", "about"]:
-                key_terms.append(word)
-        
-        # Check if any key terms appear in context
-        if key_terms:
-            matches = sum(1 for term in key_terms if term in context_lower)
-            if matches == 0 and len(key_terms) > 2:
-                print(f"[QUICK CHECK] No key terms found in context")
-                return False
-        
         # If category is out_of_scope, context won't help
         if expected_category == "none" or "out_of_scope" in expected_category:
             return False
+
+        if best_score is not None and best_score >= CONTEXT_RELEVANCE_MIN_SCORE:
+            return True
+
+        # Keyword check for weaker matches. It can only reject with 3+ key terms of 4+
+        # characters, so shorter questions skip tokenizing altogether.
+        question_lower = question.lower()
+        if len(question_lower) < _MIN_REJECTABLE_QUESTION_CHARS:
+            return True
+
+        key_terms = [w for w in question_lower.split() if len(w) > 3 and w not in _KEY_TERM_STOPWORDS]
+
+        # Reject only when 3+ key terms all miss the context; stop at the first hit
+        if len(key_terms) > 2:
+            context_lower = context_sample.lower()
+            if not any(term in context_lower for term in key_terms):
+                print(f"[QUICK CHECK] No key terms found in context")
+                return False
         
         return True
         
@@ -1117,85 +2431,37 @@ def check_context_relevance(question: str, context_sample: str, expected_categor
         # If check fails, assume context is relevant (let full validation handle it)
         return True
 
-def validate_answer_relevance(question: str, answer: str, expected_category: str) -> dict:
-    """
-    AGENT 3: Validate that the answer actually answers the question.
-    Returns: {"is_relevant": bool, "confidence": float, "reason": str}
-    """
-    try:
-        validation_prompt = f"""You are a validation system. Check if the answer actually answers the question.
-
-Question: "{question}"
-Expected Category: {expected_category}
-Answer: "{answer}"
 
-Check:
-1. Does the answer address the question asked?
-2. Is the answer about the expected category ({expected_category})?
-3. Does the answer make sense for the question?
+# Filler words dropped when falling back to "first few words" address extraction
+_ADDRESS_FILLER_WORDS = frozenset({"check", "for", "this", "my", "address", "is", "the", "a", "an"})
 
-Respond with ONLY: YES or NO
-If NO, also provide a brief reason (one sentence).
-
-Format: YES/NO|reason (if NO)
-"""
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a validation system. Respond with YES or NO, optionally followed by |reason"},
-                {"role": "user", "content": validation_prompt}
-            ],
-            temperature=0.1,
-            max_tokens=100
-        )
-        
-        result = response.choices[0].message.content.strip().upper()
-        print(f"[AGENT 3] Validation response: {result}")
-        
-        if result.startswith("YES"):
-            return {"is_relevant": True, "confidence": 0.9, "reason": "Answer is relevant"}
-        else:
-            reason = result.split("|", 1)[1].strip() if "|" in result else "Answer doesn't match question"
-            return {"is_relevant": False, "confidence": 0.8, "reason": reason}
-            
-    except Exception as e:
-        print(f"[AGENT 3] Error in validation: {e}")
-        # If validation fails, be conservative - assume answer is relevant
-        return {"is_relevant": True, "confidence": 0.5, "reason": "Validation error, assuming relevant"}
 
 def extract_address_clean(query: str) -> Optional[str]:
     """Extract and clean address from query"""
     # Remove common phrases
     query_clean = query.lower()
-    query_clean = re.sub(r"(check for|look up|find|my address is|address is|address:)", "", query_clean)
+    query_clean = _ADDRESS_CLEAN_PHRASES_RE.sub("", query_clean)
     query_clean = query_clean.strip()
     
     # Look for address patterns - improved to catch "division st" and similar
-    address_patterns = [
-        r"(\d+\s+[\w\s]+(?:street|st|avenue|ave|road|rd|drive|dr|lane|ln|boulevard|blvd|way|court|ct))",
-        r"(\d+\s+division(?:\s+st(?:reet)?)?)",
-        r"(\d+\s+[\w]+(?:\s+division)?)",
-    ]
-    
-    for pattern in address_patterns:
-        match = re.search(pattern, query_clean, re.IGNORECASE)
+    for pattern in _ADDRESS_EXTRACT_PATTERNS:
+        match = pattern.search(query_clean)
         if match:
             address = match.group(1).strip()
             # Clean up
-            address = re.sub(r'[.,;!?]+$', '', address)
+            address = _TRAILING_PUNCT_RE.sub('', address)
             if len(address) > 5:
                 return address
     
     # Fallback: if it looks like an address (has numbers and words)
-    if re.search(r'\d+', query_clean) and len(query_clean.split()) >= 2:
+    if _DIGITS_RE.search(query_clean) and len(query_clean.split()) >= 2:
         # Remove trailing words like "check for this"
         words = query_clean.split()
         if len(words) >= 2:
             # Take first 2-4 words that look like address
             address_parts = []
             for word in words[:4]:
-                if word not in ["check", "for", "this", "my", "address", "is", "the", "a", "an"]:
+                if word not in _ADDRESS_FILLER_WORDS:
                     address_parts.append(word)
             if len(address_parts) >= 2:
                 return " ".join(address_parts).strip()
@@ -1203,6 +2469,35 @@ def extract_address_clean(query: str) -> Optional[str]:
     return None
 
 
+@dataclass(frozen=True, slots=True)
+class ParsedQuery:
+    """Everything both query endpoints derive from the raw text before retrieval"""
+    raw: str
+    lower: str
+    is_greeting: bool
+    intent_type: str
+    category: str
+    address: Optional[str]
+
+
+@lru_cache(maxsize=2048)
+def parse_query(query: str, intent: Tuple[str, str]) -> ParsedQuery:
+    """
+    Extract address and detect greetings once per distinct query; `intent` is the
+    (intent_type, category) classification (see `_classify_request`). The address is
+    only read for live lookups, so it is not extracted for anything else.
+    """
+    intent_type, category = intent
+    return ParsedQuery(
+        raw=query,
+        lower=query.lower(),
+        is_greeting=is_greeting_or_simple_query(query),
+        intent_type=intent_type,
+        category=category,
+        address=extract_address_clean(query) if intent_type == "live_status_lookup" else None,
+    )
+
+
 class QueryRequest(BaseModel):
     query: str
     top_k: Optional[int] = 5
@@ -1211,10 +2506,14 @@ class QueryRequest(BaseModel):
 
 
 class QueryResponse(BaseModel):
+    """
+    Built by the handlers from trusted values with `model_construct` (no validation);
+    the route's response_model still checks it once on the way out.
+    """
     answer: str
     results: List[dict]
     query: str
-    intent: Optional[str] = None  # policy_explanatory or live_status_lookup
+    intent: Optional[str] = None  # policy_explanatory, live_status_lookup or greeting
     requires_address: Optional[bool] = False
     workflow_state: Optional[str] = None  # WAITING_FOR_ADDRESS, ADDRESS_RECEIVED, etc.
 
@@ -1262,14 +2561,43 @@ async def options_query_stream(request: Request):
     else:
         return Response(status_code=403)
 
+def _cached_stream_frames(cached: dict) -> list[bytes]:
+    """SSE frames that replay a cached streamed answer: text, results, done."""
+    return [
+        _sse_text(cached["answer"]),
+        _sse({'type': 'results', 'results': cached["results"]}),
+        _SSE_DONE,
+    ]
+
+
+# Live-lookup (collection day) replies; only the address varies per request
+_CALENDAR_URL = "https://www.cityofkingston.ca/garbage-and-recycling/collection-calendar/"
+_ADDRESS_NOTED_SUFFIX = f" To find your specific garbage collection day, please visit the City's official waste collection calendar at {_CALENDAR_URL} and enter your address there. The calendar will show you your exact collection schedule."
+_ASK_ADDRESS_STREAM_ANSWER = f"Garbage collection days depend on your address. Please provide your address (e.g., '576 Division Street') and I'll direct you to the City's official collection calendar where you can check your specific schedule: {_CALENDAR_URL}"
+_ASK_ADDRESS_ANSWER = "Garbage collection days depend on your address. Please provide your address (e.g., '576 Division Street') so I can direct you to check your specific collection schedule."
+
+
+def _address_noted_answer(user_address: str) -> str:
+    return f"I've noted your address: {user_address}." + _ADDRESS_NOTED_SUFFIX
+
+
 @app.post("/query/stream")
 async def query_pinecone_stream(request: QueryRequest):
     """Streaming endpoint for real-time response generation"""
     async def generate():
+        embedding_task = None
         try:
-            import traceback
             print(f"[STREAM] Received query: {request.query}")
             print(f"[STREAM] Language preference: {request.language}")
+
+            # Exact-match cache (keyed on the query as typed, before detection/translation)
+            cache_key = _query_cache_key(request.query, request.top_k, request.language)
+            cached = stream_cache.get(cache_key)
+            if cached is not None:
+                print(f"[CACHE] Stream exact hit")
+                for frame in _cached_stream_frames(cached):
+                    yield frame
+                return
             
             # Detect or use provided language
             detected_lang = detect_language(request.query) if request.language == "auto" else request.language
@@ -1279,31 +2607,38 @@ async def query_pinecone_stream(request: QueryRequest):
             original_query = request.query
             if user_language == "fr":
                 print(f"[STREAM] Translating French query to English...")
-                request.query = translate_text(request.query, "en", "fr")
+                request.query = await translate_text(request.query, "en", "fr")
                 print(f"[STREAM] Translated query: {request.query}")
             
             # Decide dynamic vs static (using English query)
             dynamic = is_dynamic_query(request.query)
             print(f"[ROUTER] dynamic={dynamic}")
 
+            # Start the embedding round-trip now; it drives intent classification, RAG and
+            # (dynamic route) ranking of official pages. Cancelled in `finally` if unused.
+            embedding_task = asyncio.create_task(_create_query_embedding(request.query))
+
             # Classify intent/category for STATIC RAG (still useful for filtering)
-            intent_type, category = classify_question_intent(request.query)
-            user_address = extract_address_clean(request.query)
+            intent = await _classify_request(request.query, embedding_task)
+            parsed = parse_query(request.query, intent)
+            intent_type, category = parsed.intent_type, parsed.category
+            user_address = parsed.address
             print(f"[STREAM] Intent: {intent_type}, Category: {category}")
             
             # Handle greetings (with logging)
-            is_greeting = is_greeting_or_simple_query(request.query)
+            is_greeting = parsed.is_greeting
             print(f"[STREAM] Is greeting: {is_greeting}")
             if is_greeting:
                 greeting_en = "Hello! I'm the City of Kingston 311 assistant. How can I help you today?"
-                greeting = translate_text(greeting_en, user_language, "en") if user_language == "fr" else greeting_en
+                greeting = await translate_text(greeting_en, user_language, "en") if user_language == "fr" else greeting_en
                 print(f"[STREAM] Returning greeting response")
-                yield f"data: {json.dumps({'type': 'text', 'content': greeting, 'done': True})}\n\n"
+                yield _sse({'type': 'text', 'content': greeting, 'done': True})
                 return
             
             # Dynamic route: official-site search first (citations required)
             if dynamic:
                 bucket = classify_dynamic_bucket(request.query)
+                query_embedding = await _embedding_or_none(embedding_task)
                 if bucket == "lost_found_general":
                     # Deterministic "next step" for a vague lost-item question:
                     # ask one clarifying question, and provide official links immediately.
@@ -1312,35 +2647,31 @@ async def query_pinecone_stream(request: QueryRequest):
                         "If YES: use Kingston Transit Lost & Found to report it.\n"
                         "If NO / not sure: contact the City of Kingston (311) and they can direct you to the right service.\n"
                     )
-                    msg = translate_text(msg_en, user_language, "en") if user_language == "fr" else msg_en
-                    yield f"data: {json.dumps({'type': 'text', 'content': msg})}\n\n"
+                    msg = await translate_text(msg_en, user_language, "en") if user_language == "fr" else msg_en
+                    yield _sse_text(msg)
 
-                    sources, _ = build_dynamic_context(request.query, max_results=6)
+                    sources, _ = await _await_dynamic_context(request.query, query_embedding, max_results=6)
                     formatted_results = [
                         {"score": 1.0, "content": s.get("title", ""), "category": "dynamic_search", "topic": "official_search", "source_url": s.get("url", ""), "lastmod": s.get("lastmod")}
                         for s in sources
                         if s.get("url")
                     ]
-                    yield f"data: {json.dumps({'type': 'results', 'results': formatted_results})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    yield _sse({'type': 'results', 'results': formatted_results})
+                    yield _SSE_DONE
                     return
 
                 print("[DYNAMIC] Building official-site context (sitemap + fetch)...")
-                sources, dyn_context = build_dynamic_context(request.query, max_results=6)
+                sources, dyn_context = await _await_dynamic_context(request.query, query_embedding, max_results=6)
                 if not sources:
                     print("[DYNAMIC] No official sources found")
                     fallback_msg_en = "I couldn't find an official City of Kingston page for that. Please try rephrasing, or contact 311 at 613-546-0000 for assistance."
-                    fallback_msg = translate_text(fallback_msg_en, user_language, "en") if user_language == "fr" else fallback_msg_en
-                    yield f"data: {json.dumps({'type': 'text', 'content': fallback_msg, 'done': True})}\n\n"
+                    fallback_msg = await translate_text(fallback_msg_en, user_language, "en") if user_language == "fr" else fallback_msg_en
+                    yield _sse({'type': 'text', 'content': fallback_msg, 'done': True})
                     return
 
                 # Send official links immediately (before streaming) so the UI can render them reliably.
-                formatted_results = [
-                    {"score": 1.0, "content": s.get("title", ""), "category": "dynamic_search", "topic": "official_search", "source_url": s.get("url", ""), "lastmod": s.get("lastmod")}
-                    for s in sources
-                    if s.get("url")
-                ]
-                yield f"data: {json.dumps({'type': 'results', 'results': formatted_results})}\n\n"
+                formatted_results = _dynamic_source_results(sources)
+                yield _sse({'type': 'results', 'results': formatted_results})
 
                 if not dyn_context:
                     # If pages are JS-heavy and we can't extract text, at least provide links.
@@ -1354,363 +2685,266 @@ async def query_pinecone_stream(request: QueryRequest):
                             lines_en.append(f"{i}. {title}: {url} [{i}]")
                     lines_en.append("If you still can’t find what you need there, contact 311 at 613-546-0000.")
                     msg_en = "\n".join(lines_en).strip()
-                    msg = translate_text(msg_en, user_language, "en") if user_language == "fr" else msg_en
-                    yield f"data: {json.dumps({'type': 'text', 'content': msg})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    msg = await translate_text(msg_en, user_language, "en") if user_language == "fr" else msg_en
+                    yield _sse_text(msg)
+                    yield _SSE_DONE
                     return
                 else:
-                    dyn_prompt = f"""You are the City of Kingston 311 assistant.
-Answer the user's question using ONLY the official sources provided below.
-
-Rules:
-1) If the sources do not contain the answer, say: "I couldn't confirm that on official City of Kingston sources."
-2) Do NOT guess. Do NOT use outside knowledge.
-3) Include citations like [1], [2] matching the source numbers.
-4) Keep the answer clear and practical.
-5) Do not add extra sections like "Official links" — citations [1], [2] are enough.
-
-Question: {request.query}
-
-Official sources:
-{dyn_context}
-"""
-
                     print("[DYNAMIC] Starting OpenAI stream...")
-                    stream = openai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You answer only from provided sources and include citations."},
-                            {"role": "user", "content": dyn_prompt},
-                        ],
-                        temperature=0.1,
-                        max_tokens=700,
-                        stream=True,
-                    )
-
-                    full_answer = ""
-
-                    if user_language == "fr":
-                        for chunk in stream:
-                            try:
-                                if chunk.choices and len(chunk.choices) > 0:
-                                    delta = chunk.choices[0].delta
-                                    if hasattr(delta, "content") and delta.content:
-                                        full_answer += delta.content
-                            except Exception as chunk_error:
-                                print(f"[DYNAMIC STREAM] Error processing chunk: {chunk_error}")
-                                continue
-
-                        full_answer = re.sub(r"\s+", " ", full_answer).strip()
-                        full_answer = translate_text(full_answer, "fr", "en")
-                        words = full_answer.split()
-                        for i, word in enumerate(words):
-                            yield f"data: {json.dumps({'type': 'text', 'content': word + (' ' if i < len(words)-1 else '')})}\n\n"
-                    else:
-                        for chunk in stream:
-                            try:
-                                if chunk.choices and len(chunk.choices) > 0:
-                                    delta = chunk.choices[0].delta
-                                    if hasattr(delta, "content") and delta.content:
-                                        full_answer += delta.content
-                                        yield f"data: {json.dumps({'type': 'text', 'content': delta.content})}\n\n"
-                            except Exception as chunk_error:
-                                print(f"[DYNAMIC STREAM] Error processing chunk: {chunk_error}")
-                                continue
+                    async for frame in _stream_dynamic_answer(request.query, dyn_context, user_language):
+                        yield frame
 
                     # Do not inject link blocks into the answer text.
                     # The UI renders official links from the 'results' event below for consistency.
 
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                yield _SSE_DONE
                 return
 
             # Handle out-of-scope questions (only after dynamic router says "not dynamic")
             if intent_type == "out_of_scope" or category == "none":
                 print(f"[STREAM] Question is out of scope")
                 answer_en = "I'm the City of Kingston 311 assistant. I couldn't find that in our policies knowledge base. You can try asking about City services/policies, or contact 311 at 613-546-0000 for assistance."
-                answer = translate_text(answer_en, user_language, "en") if user_language == "fr" else answer_en
-                yield f"data: {json.dumps({'type': 'text', 'content': answer})}\n\n"
+                answer = await translate_text(answer_en, user_language, "en") if user_language == "fr" else answer_en
+                yield _sse_text(answer)
                 # Always provide at least one official link for non-greeting responses
-                yield f"data: {json.dumps({'type': 'results', 'results': _ensure_official_links_for_category([{'score': 1.0, 'content': 'City of Kingston – Contact Us (311)', 'category': 'official', 'topic': 'contact', 'source_url': 'https://www.cityofkingston.ca/council-and-city-administration/contact-us/'}], 'official')})}\n\n"
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                yield _sse({'type': 'results', 'results': _ensure_official_links_for_category([{'score': 1.0, 'content': 'City of Kingston – Contact Us (311)', 'category': 'official', 'topic': 'contact', 'source_url': 'https://www.cityofkingston.ca/council-and-city-administration/contact-us/'}], 'official')})
+                yield _SSE_DONE
                 return
             
             # Handle live lookups
             if intent_type == "live_status_lookup":
-                calendar_url = "https://www.cityofkingston.ca/garbage-and-recycling/collection-calendar/"
-                if user_address:
-                    answer_en = f"I've noted your address: {user_address}. To find your specific garbage collection day, please visit the City's official waste collection calendar at {calendar_url} and enter your address there. The calendar will show you your exact collection schedule."
-                else:
-                    answer_en = f"Garbage collection days depend on your address. Please provide your address (e.g., '576 Division Street') and I'll direct you to the City's official collection calendar where you can check your specific schedule: {calendar_url}"
-                answer = translate_text(answer_en, user_language, "en") if user_language == "fr" else answer_en
-                yield f"data: {json.dumps({'type': 'text', 'content': answer})}\n\n"
-                yield f"data: {json.dumps({'type': 'results', 'results': _ensure_official_links_for_category([{'score': 1.0, 'content': 'Collection calendar', 'category': 'waste_collection', 'topic': 'collection_calendar', 'source_url': calendar_url}], 'waste_collection')})}\n\n"
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                answer_en = _address_noted_answer(user_address) if user_address else _ASK_ADDRESS_STREAM_ANSWER
+                answer = await translate_text(answer_en, user_language, "en") if user_language == "fr" else answer_en
+                yield _sse_text(answer)
+                yield _sse({'type': 'results', 'results': _ensure_official_links_for_category([{'score': 1.0, 'content': 'Collection calendar', 'category': 'waste_collection', 'topic': 'collection_calendar', 'source_url': _CALENDAR_URL}], 'waste_collection')})
+                yield _SSE_DONE
                 return
             
             # Generate embedding and query Pinecone
-            print(f"[STREAM] Generating embedding...")
-            embedding_response = openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=request.query
-            )
-            query_embedding = embedding_response.data[0].embedding
-            print(f"[STREAM] Querying Pinecone...")
-            
-            results = index.query(
-                vector=query_embedding,
-                top_k=request.top_k * 3,
-                include_metadata=True
-            )
-            print(f"[STREAM] Found {len(results.matches)} matches")
+            print(f"[STREAM] Awaiting embedding...")
+            query_embedding = await embedding_task
 
-            formatted_results, context_parts = _select_context_and_results(
-                results.matches,
-                expected_category=category,
-                top_k=request.top_k,
+            # Semantic cache: a near-duplicate question already answered in this language
+            cached = stream_cache.get_similar(
+                query_embedding,
+                accept=lambda v: v["category"] == category and v["top_k"] == request.top_k and v["language"] == user_language,
             )
+            if cached is not None:
+                print(f"[CACHE] Stream semantic hit")
+                for frame in _cached_stream_frames(cached):
+                    yield frame
+                return
+
+            print(f"[STREAM] Querying Pinecone...")
+            try:
+                formatted_results, context_parts = await _retrieve_context(query_embedding, category, request.top_k)
+            except asyncio.TimeoutError:
+                print(f"[STREAM] Pinecone timed out - falling back to official-site search")
+                formatted_results, context_parts = [], []
+            # The retrieved chunks themselves, before any fallback link is prepended
+            retrieved_results = formatted_results
+            best_score = max((r["score"] or 0.0 for r in retrieved_results), default=None)
             formatted_results = _ensure_official_links_for_category(formatted_results, category)
-            formatted_results = _annotate_results_lastmod(formatted_results)
+            formatted_results = await _annotate_results_lastmod(formatted_results)
             
             # Quick fallback if no context found
             if not context_parts:
                 print(f"[STREAM] No RAG context - falling back to official-site search")
-                sources, dyn_context = build_dynamic_context(request.query, max_results=4)
+                sources, dyn_context = await _await_dynamic_context(request.query, query_embedding)
                 if dyn_context:
-                    # Reuse dynamic prompt (non-guessing, citations)
-                    dyn_prompt = f"""You are the City of Kingston 311 assistant.
-Answer the user's question using ONLY the official sources provided below.
-
-Rules:
-1) If the sources do not contain the answer, say: "I couldn't confirm that on official City of Kingston sources."
-2) Do NOT guess. Do NOT use outside knowledge.
-3) Include citations like [1], [2] matching the source numbers.
+                    async for frame in _stream_dynamic_answer(request.query, dyn_context, user_language):
+                        yield frame
 
-Question: {request.query}
-
-Official sources:
-{dyn_context}
-"""
-                    stream = openai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You answer only from provided sources and include citations."},
-                            {"role": "user", "content": dyn_prompt},
-                        ],
-                        temperature=0.1,
-                        max_tokens=700,
-                        stream=True,
-                    )
-                    full_answer = ""
-                    if user_language == "fr":
-                        for chunk in stream:
-                            if chunk.choices and len(chunk.choices) > 0:
-                                delta = chunk.choices[0].delta
-                                if hasattr(delta, "content") and delta.content:
-                                    full_answer += delta.content
-                        full_answer = re.sub(r"\s+", " ", full_answer).strip()
-                        full_answer = translate_text(full_answer, "fr", "en")
-                        words = full_answer.split()
-                        for i, word in enumerate(words):
-                            yield f"data: {json.dumps({'type': 'text', 'content': word + (' ' if i < len(words)-1 else '')})}\n\n"
-                    else:
-                        for chunk in stream:
-                            if chunk.choices and len(chunk.choices) > 0:
-                                delta = chunk.choices[0].delta
-                                if hasattr(delta, "content") and delta.content:
-                                    yield f"data: {json.dumps({'type': 'text', 'content': delta.content})}\n\n"
-
-                    formatted_results = [
-                        {"score": 1.0, "content": s.get("title", ""), "category": "dynamic_search", "topic": "official_search", "source_url": s.get("url", "")}
-                        for s in sources
-                        if s.get("url")
-                    ]
-                    yield f"data: {json.dumps({'type': 'results', 'results': formatted_results})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    formatted_results = _dynamic_source_results(sources)
+                    yield _sse({'type': 'results', 'results': formatted_results})
+                    yield _SSE_DONE
                     return
 
                 fallback_msg_en = "I couldn't find official information about that. Please try rephrasing, or contact 311 at 613-546-0000 for assistance."
-                fallback_msg = translate_text(fallback_msg_en, user_language, "en") if user_language == "fr" else fallback_msg_en
-                yield f"data: {json.dumps({'type': 'text', 'content': fallback_msg, 'done': True})}\n\n"
+                fallback_msg = await translate_text(fallback_msg_en, user_language, "en") if user_language == "fr" else fallback_msg_en
+                yield _sse({'type': 'text', 'content': fallback_msg, 'done': True})
                 return
             
             # Check if context is relevant - quick validation before generating answer
             print(f"[STREAM] Checking context relevance...")
-            context_relevance = check_context_relevance(request.query, "\n\n".join(context_parts[:2]), category)
+            context_relevance = check_context_relevance(
+                request.query, "\n\n".join(context_parts[:2]), category, best_score=best_score
+            )
             if not context_relevance:
                 print(f"[STREAM] Context not relevant - falling back to official-site search")
-                sources, dyn_context = build_dynamic_context(request.query, max_results=4)
+                sources, dyn_context = await _await_dynamic_context(request.query, query_embedding)
                 if dyn_context:
-                    dyn_prompt = f"""You are the City of Kingston 311 assistant.
-Answer the user's question using ONLY the official sources provided below.
+                    async for frame in _stream_dynamic_answer(request.query, dyn_context, user_language):
+                        yield frame
 
-Rules:
-1) If the sources do not contain the answer, say: "I couldn't confirm that on official City of Kingston sources."
-2) Do NOT guess. Do NOT use outside knowledge.
-3) Include citations like [1], [2] matching the source numbers.
-
-Question: {request.query}
-
-Official sources:
-{dyn_context}
-"""
-                    stream = openai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You answer only from provided sources and include citations."},
-                            {"role": "user", "content": dyn_prompt},
-                        ],
-                        temperature=0.1,
-                        max_tokens=700,
-                        stream=True,
-                    )
-                    full_answer = ""
-                    if user_language == "fr":
-                        for chunk in stream:
-                            if chunk.choices and len(chunk.choices) > 0:
-                                delta = chunk.choices[0].delta
-                                if hasattr(delta, "content") and delta.content:
-                                    full_answer += delta.content
-                        full_answer = re.sub(r"\s+", " ", full_answer).strip()
-                        full_answer = translate_text(full_answer, "fr", "en")
-                        words = full_answer.split()
-                        for i, word in enumerate(words):
-                            yield f"data: {json.dumps({'type': 'text', 'content': word + (' ' if i < len(words)-1 else '')})}\n\n"
-                    else:
-                        for chunk in stream:
-                            if chunk.choices and len(chunk.choices) > 0:
-                                delta = chunk.choices[0].delta
-                                if hasattr(delta, "content") and delta.content:
-                                    yield f"data: {json.dumps({'type': 'text', 'content': delta.content})}\n\n"
-
-                    formatted_results = [
-                        {"score": 1.0, "content": s.get("title", ""), "category": "dynamic_search", "topic": "official_search", "source_url": s.get("url", "")}
-                        for s in sources
-                        if s.get("url")
-                    ]
-                    yield f"data: {json.dumps({'type': 'results', 'results': formatted_results})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    formatted_results = _dynamic_source_results(sources)
+                    yield _sse({'type': 'results', 'results': formatted_results})
+                    yield _SSE_DONE
                     return
 
                 fallback_msg_en = "I couldn't confirm that on official City of Kingston sources. Please contact 311 at 613-546-0000 for assistance."
-                fallback_msg = translate_text(fallback_msg_en, user_language, "en") if user_language == "fr" else fallback_msg_en
-                yield f"data: {json.dumps({'type': 'text', 'content': fallback_msg, 'done': True})}\n\n"
+                fallback_msg = await translate_text(fallback_msg_en, user_language, "en") if user_language == "fr" else fallback_msg_en
+                yield _sse({'type': 'text', 'content': fallback_msg, 'done': True})
                 return
             
-            context = "\n\n".join(context_parts)
+            context = _prompt_context(retrieved_results, context_parts)
             template = get_prompt_template(category)
             prompt_text = template.format(context=context, question=request.query)
             
             print(f"[STREAM] Starting OpenAI stream...")
             # Stream using OpenAI directly
-            stream = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant for the City of Kingston 311 service. Do not include mailing address information (PO Box 640) or cheque payment instructions in your responses."},
-                    {"role": "user", "content": prompt_text}
-                ],
-                temperature=0.2,
-                max_tokens=800,
-                stream=True
-            )
+            async with _openai_semaphore:
+                stream = await async_openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": _answer_system_prompt(get_stream_system_prompt(category), user_language)},
+                        {"role": "user", "content": prompt_text}
+                    ],
+                    temperature=0.2,
+                    max_tokens=800,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
             
-            full_answer = ""
-            chunk_count = 0
+            answer_pieces: list[str] = []
+            # AGENT 3: the relevance verdict comes from the marker at the end of the stream
+            validation_result: dict = {}
+            answer_contents = _strip_mailing_instructions_stream(
+                _strip_relevance_marker(_iter_stream_content(stream), validation_result)
+            )
             
-            # If French, we need to collect full answer before translating
-            if user_language == "fr":
-                # Collect all chunks first
-                for chunk in stream:
-                    try:
-                        if chunk.choices and len(chunk.choices) > 0:
-                            delta = chunk.choices[0].delta
-                            if hasattr(delta, 'content') and delta.content:
-                                content = delta.content
-                                full_answer += content
-                                chunk_count += 1
-                    except Exception as chunk_error:
-                        print(f"[STREAM] Error processing chunk: {chunk_error}")
-                        continue
-                
-                print(f"[STREAM] Collected {chunk_count} chunks, total length: {len(full_answer)}")
-                
-                # Clean up the full answer
-                full_answer = re.sub(r'\s+', ' ', full_answer).strip()
-                # Remove mailing address information
-                full_answer = re.sub(r'Make your cheque payable to City of Kingston and mail it to.*?Kingston, ON K7L 4X1.*?(?=\n\n|\Z)', '', full_answer, flags=re.DOTALL | re.IGNORECASE)
-                full_answer = re.sub(r'Make your cheque payable.*?PO Box 640.*?Kingston, ON K7L 4X1.*?(?=\n\n|\Z)', '', full_answer, flags=re.DOTALL | re.IGNORECASE)
-                
-                # Translate to French
-                print(f"[STREAM] Translating answer to French...")
-                full_answer = translate_text(full_answer, "fr", "en")
-                
-                # Stream the translated answer
-                # Split into words for smoother streaming effect
-                words = full_answer.split()
-                for i, word in enumerate(words):
-                    content = word + (" " if i < len(words) - 1 else "")
-                    yield f"data: {json.dumps({'type': 'text', 'content': content})}\n\n"
-            else:
-                # English - stream normally
-                for chunk in stream:
-                    try:
-                        if chunk.choices and len(chunk.choices) > 0:
-                            delta = chunk.choices[0].delta
-                            if hasattr(delta, 'content') and delta.content:
-                                content = delta.content
-                                full_answer += content
-                                chunk_count += 1
-                                # Send content as-is (frontend will clean spaces)
-                                if content:
-                                    yield f"data: {json.dumps({'type': 'text', 'content': content})}\n\n"
-                    except Exception as chunk_error:
-                        print(f"[STREAM] Error processing chunk: {chunk_error}")
-                        continue
-                
-                print(f"[STREAM] Streamed {chunk_count} chunks, total length: {len(full_answer)}")
-                
-                # Clean up the full answer
-                full_answer = re.sub(r'\s+', ' ', full_answer).strip()
-                # Remove mailing address information
-                full_answer = re.sub(r'Make your cheque payable to City of Kingston and mail it to.*?Kingston, ON K7L 4X1.*?(?=\n\n|\Z)', '', full_answer, flags=re.DOTALL | re.IGNORECASE)
-                full_answer = re.sub(r'Make your cheque payable.*?PO Box 640.*?Kingston, ON K7L 4X1.*?(?=\n\n|\Z)', '', full_answer, flags=re.DOTALL | re.IGNORECASE)
+            # Both languages stream directly (French is generated in French; deltas are
+            # coalesced into fewer frames, sent as-is: the frontend cleans spaces)
+            async for content in _coalesce_stream_content(answer_contents):
+                answer_pieces.append(content)
+                yield _sse_text(content)
+
+            streamed_answer = "".join(answer_pieces)
+            print(f"[STREAM] Streamed {len(answer_pieces)} chunks, total length: {len(streamed_answer)}")
             
-            # AGENT 3: Validate the answer actually answers the question
-            print(f"[AGENT 3] Validating answer...")
-            validation_result = validate_answer_relevance(request.query, full_answer, category)
             print(f"[AGENT 3] Validation result: {validation_result}")
             
             if not validation_result["is_relevant"]:
                 # Answer doesn't match question - send correction message
                 print(f"[AGENT 3] Answer is not relevant, sending correction")
                 correction_en = "\n\nI don't have specific information about that in our knowledge base. Please contact 311 at 613-546-0000 for assistance with this question."
-                correction = translate_text(correction_en, user_language, "en") if user_language == "fr" else correction_en
-                yield f"data: {json.dumps({'type': 'text', 'content': correction})}\n\n"
+                correction = await translate_text(correction_en, user_language, "en") if user_language == "fr" else correction_en
+                yield _sse_text(correction)
                 formatted_results = []
             formatted_results = _ensure_official_links_for_category(formatted_results, category)
             
             # Send results metadata
-            yield f"data: {json.dumps({'type': 'results', 'results': formatted_results})}\n\n"
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            yield _sse({'type': 'results', 'results': formatted_results})
+            yield _SSE_DONE
+
+            if validation_result["is_relevant"]:
+                stream_cache.put(
+                    cache_key,
+                    query_embedding,
+                    {
+                        "answer": streamed_answer,
+                        "results": formatted_results,
+                        "category": category,
+                        "top_k": request.top_k,
+                        "language": user_language,
+                    },
+                )
                 
         except Exception as e:
             error_msg = str(e)
             error_trace = traceback.format_exc()
             print(f"[STREAM ERROR] {error_msg}")
             print(f"[STREAM ERROR TRACEBACK] {error_trace}")
-            yield f"data: {json.dumps({'type': 'error', 'content': error_msg})}\n\n"
+            yield _sse({'type': 'error', 'content': error_msg})
+        finally:
+            if embedding_task is not None and not embedding_task.done():
+                embedding_task.cancel()
     
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    return StreamingResponse(generate(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+# Greeting replies for /query, handed out round-robin
+_GREETING_RESPONSES = (
+    "Hello! I'm the City of Kingston 311 assistant. I can help answer questions about city services, policies, and information. What can I help you with today?",
+    "Hi! How can I help you with City of Kingston services today?",
+    "Hey! I'm here to help with questions about Kingston city services. What would you like to know?",
+)
+_GREETING_RESPONSE_CYCLE = itertools.cycle(_GREETING_RESPONSES)
+
+
+# /query answers being computed, by cache key; each holds (response, error)
+_query_inflight: dict[str, asyncio.Future] = {}
 
 
 @app.post("/query", response_model=QueryResponse)
 async def query_pinecone(request: QueryRequest):
     """Query Pinecone for relevant policy information using LangChain for answer generation"""
+    # Greetings need no classification, address extraction or embedding
+    if is_greeting_or_simple_query(request.query):
+        return QueryResponse.model_construct(
+            query=request.query,
+            answer=next(_GREETING_RESPONSE_CYCLE),
+            results=[],
+            intent="greeting",
+        )
+
+    # Repeat questions are answered from the cache without any network calls
+    cache_key = _query_cache_key(request.query, request.top_k)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        print(f"[CACHE] Exact hit for query: {request.query}")
+        # Already validated when it was cached: serialize directly, skipping the
+        # response_model round-trip
+        return ORJSONResponse({"query": request.query, **cached["response"]})
+
+    # The same question is already being answered: wait for that answer instead
+    inflight = _query_inflight.get(cache_key)
+    if inflight is not None:
+        print(f"[CACHE] Joining in-flight query: {request.query}")
+        try:
+            response, error = await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # The first request was cancelled; answer this one ourselves
+        else:
+            if error is not None:
+                raise error
+            return response.model_copy(update={"query": request.query})
+
+    future = asyncio.get_running_loop().create_future()
+    _query_inflight[cache_key] = future
+    try:
+        response = await _answer_query(request, cache_key)
+    except Exception as e:
+        future.set_result((None, e))
+        raise
+    else:
+        future.set_result((response, None))
+        return response
+    finally:
+        if not future.done():
+            future.cancel()
+        if _query_inflight.get(cache_key) is future:
+            del _query_inflight[cache_key]
+
+
+async def _answer_query(request: QueryRequest, cache_key: str) -> QueryResponse:
+    """Classify, retrieve and generate the /query answer (exact cache already missed)"""
+    embedding_task = None
     try:
-        # STEP 1: Classify question intent (returns intent_type and category)
-        intent_type, category = classify_question_intent(request.query)
+        # Start embedding in the background; it is cancelled below if the request
+        # fails before it completes.
+        embedding_task = asyncio.create_task(_create_query_embedding(request.query))
+
+        # STEP 1: Classify question intent (returns intent_type and category),
+        # from the query embedding when it is close to a known example
+        intent = await _classify_request(request.query, embedding_task)
+        parsed = parse_query(request.query, intent)
+        intent_type, category = parsed.intent_type, parsed.category
         
         # STEP 2: Extract address if present
-        user_address = extract_address_clean(request.query)
+        user_address = parsed.address
         
         # STEP 3: Determine workflow state
         workflow_state = None
@@ -1725,39 +2959,15 @@ async def query_pinecone(request: QueryRequest):
         
         # STEP 4: Handle live lookup questions (DO NOT use RAG)
         if intent_type == "live_status_lookup":
-            calendar_url = "https://www.cityofkingston.ca/garbage-and-recycling/collection-calendar/"
-            
             if user_address:
                 # Address provided - acknowledge and redirect to official source
                 # Note: We cannot directly query the City's calendar API, so we redirect to their tool
-                answer = f"I've noted your address: {user_address}. To find your specific garbage collection day, please visit the City's official waste collection calendar at {calendar_url} and enter your address there. The calendar will show you your exact collection schedule."
-                formatted_results = []
+                answer = _address_noted_answer(user_address)
             else:
                 # No address - ask for it
-                answer = "Garbage collection days depend on your address. Please provide your address (e.g., '576 Division Street') so I can direct you to check your specific collection schedule."
-                formatted_results = []
+                answer = _ASK_ADDRESS_ANSWER
             
-            return QueryResponse(
-                query=request.query,
-                answer=answer,
-                results=formatted_results,
-                intent=intent_type,
-                requires_address=requires_address,
-                workflow_state=workflow_state
-            )
-        
-        # STEP 5: Handle policy questions (USE RAG) - Simple database lookup
-        # Check if this is a greeting - return simple greeting response
-        is_greeting = is_greeting_or_simple_query(request.query)
-        if is_greeting:
-            greeting_responses = [
-                "Hello! I'm the City of Kingston 311 assistant. I can help answer questions about city services, policies, and information. What can I help you with today?",
-                "Hi! How can I help you with City of Kingston services today?",
-                "Hey! I'm here to help with questions about Kingston city services. What would you like to know?"
-            ]
-            import random
-            answer = random.choice(greeting_responses)
-            return QueryResponse(
+            return QueryResponse.model_construct(
                 query=request.query,
                 answer=answer,
                 results=[],
@@ -1766,106 +2976,64 @@ async def query_pinecone(request: QueryRequest):
                 workflow_state=workflow_state
             )
         
-        # Generate embedding for query
-        embedding_response = openai_client.embeddings.create(
-            model="text-embedding-3-small",
-            input=request.query
-        )
-        query_embedding = embedding_response.data[0].embedding
-        
-        # Query Pinecone - Get more results, then filter by category
-        results = index.query(
-            vector=query_embedding,
-            top_k=request.top_k * 3,  # Get more to filter from
-            include_metadata=True
-        )
+        # STEP 5: Handle policy questions (USE RAG) - Simple database lookup
+        # Embedding for query (started before classification)
+        query_embedding = await embedding_task
 
-        formatted_results, context_parts = _select_context_and_results(
-            results.matches,
-            expected_category=category,
-            top_k=request.top_k,
+        # Near-duplicate of a recently answered question in the same category?
+        cached = query_cache.get_similar(
+            query_embedding,
+            accept=lambda v: v["category"] == category and v["top_k"] == request.top_k,
         )
+        if cached is not None:
+            print(f"[CACHE] Semantic hit for query: {request.query}")
+            return QueryResponse.model_construct(query=request.query, **cached["response"])
+        
+        # Query Pinecone (category filter is applied by the index)
+        formatted_results, context_parts = await _retrieve_context(query_embedding, category, request.top_k)
         
         # Generate answer using LangChain - with category-specific prompt
         if context_parts:
-            context = "\n\n".join(context_parts)
+            context = _prompt_context(formatted_results, context_parts)
             
             # Create category-specific chain
             llm_chain = create_llm_chain(category)
             
-            result = llm_chain.invoke({
-                "context": context,
-                "question": request.query
-            })
+            async with _openai_semaphore:
+                result = await llm_chain.ainvoke({
+                    "context": context,
+                    "question": request.query
+                })
             answer = result.content if hasattr(result, 'content') else str(result)
             
             # Remove mailing address information from answer
-            answer = re.sub(r'Make your cheque payable to City of Kingston and mail it to.*?Kingston, ON K7L 4X1.*?(?=\n\n|\Z)', '', answer, flags=re.DOTALL | re.IGNORECASE)
-            answer = re.sub(r'Make your cheque payable.*?PO Box 640.*?Kingston, ON K7L 4X1.*?(?=\n\n|\Z)', '', answer, flags=re.DOTALL | re.IGNORECASE)
+            answer = _strip_mailing_instructions(answer)
             
-            # Check if answer is saying context is missing (common LLM error)
-            if "context" in answer.lower() and ("missing" in answer.lower() or "not provided" in answer.lower() or "seems that the context" in answer.lower()):
-                # LLM is ignoring context - regenerate with explicit instruction
-                strict_prompt = PromptTemplate(
-                    template="""You MUST answer using the context provided below. The context contains the answer - use it.
-
-Context:
-{context}
-
-Question: {question}
-
-Answer the question using the information from the context above. Do not say the context is missing - it is provided above:""",
-                    input_variables=["context", "question"]
-                )
-                strict_chain = strict_prompt | llm
-                result = strict_chain.invoke({"context": context, "question": request.query})
-                answer = result.content if hasattr(result, 'content') else str(result)
-            
-            # If it's a greeting, don't include additional information
-            if is_greeting:
-                formatted_results = []
+            # VALIDATION: Check that answer doesn't mention unrelated categories.
+            # Strip offending sentences locally; only regenerate if too little is left.
+            filtered_answer = _strip_unrelated_sentences(answer, category)
+            if filtered_answer != answer:
+                if len(filtered_answer) >= _MIN_FILTERED_ANSWER_CHARS:
+                    answer = filtered_answer
+                else:
+                    # Answer is mostly about an unrelated topic - regenerate with stricter prompt
+                    strict_chain = _STRICT_LLM_CHAINS[category]
+                    async with _openai_semaphore:
+                        result = await strict_chain.ainvoke({"context": context, "question": request.query})
+                    answer = result.content if hasattr(result, 'content') else str(result)
             
             # Add form/application links only if mentioned in answer and we have source URLs
             source_urls = [r.get("source_url", "") for r in formatted_results if r.get("source_url")]
-            forms_mentioned = any(keyword in answer.lower() for keyword in ["form", "application", "apply", "submit"])
+            forms_mentioned = _FORM_KEYWORDS_RE.search(answer) is not None
             
-            if forms_mentioned and source_urls and not is_greeting:
+            if forms_mentioned and source_urls:
                 # Add application link if forms are mentioned
                 if "http" not in answer:
                     answer += f"\n\nTo apply, visit: {source_urls[0]}"
-            
-            # VALIDATION: Check that answer doesn't mention unrelated categories
-            unrelated_categories = {
-                "parking": ["garbage", "waste", "collection calendar", "recycling"],
-                "property_tax": ["garbage", "waste", "parking", "collection"],
-                "waste_collection": ["parking permit", "property tax"],
-                "hazardous_waste": ["parking", "tax", "collection calendar"],
-                "fire_permits": ["garbage", "parking", "tax"],
-                "noise": ["garbage", "parking", "tax", "collection"]
-            }
-            
-            if category in unrelated_categories:
-                answer_lower = answer.lower()
-                for forbidden_term in unrelated_categories[category]:
-                    if forbidden_term in answer_lower and category not in ["waste_collection"]:  # Allow some overlap for waste
-                        # Answer mentions unrelated topic - regenerate with stricter prompt
-                        strict_template = f"""Answer ONLY about {category.replace('_', ' ')}. Do NOT mention garbage, waste collection, parking permits, property tax, or any other topics.
-
-Context:
-{{context}}
-
-Question: {{question}}
-
-Answer (ONLY {category.replace('_', ' ')}):"""
-                        strict_prompt = PromptTemplate(template=strict_template, input_variables=["context", "question"])
-                        strict_chain = strict_prompt | llm
-                        result = strict_chain.invoke({"context": context, "question": request.query})
-                        answer = result.content if hasattr(result, 'content') else str(result)
-                        break
         else:
             answer = "I couldn't find specific information about that. Please try rephrasing your question or contact 311 at 613-546-0000."
         
-        return QueryResponse(
+        response = QueryResponse.model_construct(
             query=request.query,
             answer=answer,
             results=formatted_results,
@@ -1873,27 +3041,56 @@ Answer (ONLY {category.replace('_', ' ')}):"""
             requires_address=requires_address,
             workflow_state=workflow_state
         )
+        # Only cache grounded answers; "couldn't find" replies should be retried
+        if context_parts:
+            query_cache.put(
+                cache_key,
+                query_embedding,
+                {
+                    "response": response.model_dump(exclude={"query"}),
+                    "category": category,
+                    "top_k": request.top_k,
+                },
+            )
+        return response
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error querying: {str(e)}")
+    finally:
+        if embedding_task is not None and not embedding_task.done():
+            embedding_task.cancel()
+
+
+# Frequent liveness probes share one Pinecone stats call per TTL
+HEALTH_CACHE_TTL_SECONDS = float(os.getenv("HEALTH_CACHE_TTL_SECONDS", "10"))
+_health_cache: dict[str, Any] = {"ts": 0.0, "payload": None}
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (result cached for HEALTH_CACHE_TTL_SECONDS)"""
+    now = time.monotonic()
+    if _health_cache["payload"] is not None and now - _health_cache["ts"] < HEALTH_CACHE_TTL_SECONDS:
+        return _health_cache["payload"]
     try:
         # Check Pinecone connection
-        stats = index.describe_index_stats()
-        return {
+        stats = await asyncio.wait_for(
+            asyncio.to_thread(index.describe_index_stats),
+            timeout=PINECONE_TIMEOUT_SECONDS,
+        )
+        payload = {
             "status": "healthy",
             "pinecone": "connected",
             "total_vectors": stats.total_vector_count
         }
     except Exception as e:
-        return {
+        payload = {
             "status": "unhealthy",
-            "error": str(e)
+            "error": str(e) or type(e).__name__
         }
+    _health_cache["ts"] = now
+    _health_cache["payload"] = payload
+    return payload
 
 
 @app.post("/audio/transcribe")
@@ -1917,7 +3114,7 @@ async def audio_transcribe(audio: UploadFile = File(...), language: Optional[str
         if language and language in ("en", "fr"):
             params["language"] = "fr" if language == "fr" else "en"
 
-        result = openai_client.audio.transcriptions.create(**params)
+        result = await async_openai_client.audio.transcriptions.create(**params)
         text = (getattr(result, "text", None) or "").strip()
         return {"text": text}
     except HTTPException:
@@ -1947,7 +3144,7 @@ async def audio_speak(req: SpeakRequest):
         # Keep payload reasonable; avoid huge TTS requests
         safe_text = text[:4000]
 
-        resp = openai_client.audio.speech.create(
+        resp = await async_openai_client.audio.speech.create(
             model="tts-1",
             voice=voice,
             input=safe_text,
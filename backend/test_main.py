@@ -0,0 +1,125 @@
+"""Offline tests for the pure text helpers in main.py (no network calls)."""
+import asyncio
+import os
+
+os.environ.setdefault("PINECONE_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import main  # noqa: E402
+
+
+def test_strip_unrelated_keeps_urls_intact():
+    url = "https://www.cityofkingston.ca/roads-parking-and-transportation/parking/permits"
+    answer = (
+        f"Apply for a residential permit at {url} before the first of the month. "
+        "Do not block garbage bins on collection day. Permits are valid for one year."
+    )
+    filtered = main._strip_unrelated_sentences(answer, "parking")
+    assert filtered == (
+        f"Apply for a residential permit at {url} before the first of the month. "
+        "Permits are valid for one year."
+    )
+
+
+def test_strip_unrelated_keeps_decimals_intact():
+    answer = "A monthly permit costs $52.50 plus HST. Recycling bins must stay off the road."
+    assert main._strip_unrelated_sentences(answer, "parking") == "A monthly permit costs $52.50 plus HST."
+
+
+def test_strip_unrelated_matches_whole_words_only():
+    answer = "Your tax bill includes wastewater charges. A taxi stand is not a parking spot."
+    assert main._strip_unrelated_sentences(answer, "property_tax") == "Your tax bill includes wastewater charges."
+    assert main._strip_unrelated_sentences("Call a taxi to the depot.", "hazardous_waste") == "Call a taxi to the depot."
+
+
+def test_strip_unrelated_matches_plurals():
+    answer = "Fire permits are free. Property taxes are due in February."
+    assert main._strip_unrelated_sentences(answer, "fire_permits") == "Fire permits are free."
+
+
+def test_strip_unrelated_drops_lines_with_nothing_left():
+    answer = "Permits are issued online.\n- Put garbage out by 7am.\n- Display the permit on the dash."
+    assert main._strip_unrelated_sentences(answer, "parking") == (
+        "Permits are issued online.\n- Display the permit on the dash."
+    )
+
+
+def test_detect_language_short_french_queries():
+    for query in (
+        "Permis de stationnement",
+        "Stationnement résidentiel",
+        "Permis stationnement",
+        "Collecte des ordures",
+        "Taxe foncière",
+        "Quand est la collecte?",
+        "bonjour",
+        "J'ai perdu mon portefeuille",
+        "Qu’est-ce que c’est?",
+    ):
+        assert main.detect_language(query) == "fr", query
+
+
+def test_detect_language_english_queries():
+    for query in (
+        "How do I get a parking permit?",
+        "When is garbage day on my street?",
+        "Can I open a café patio on my street?",
+        "La Salle Causeway closure",
+        "parking",
+        "Naïve question about parking",
+        "Why don't they plow my street? It's blocked",
+    ):
+        assert main.detect_language(query) == "en", query
+
+
+def _stream_through(stream_filter, text, size=5):
+    async def chunks():
+        for i in range(0, len(text), size):
+            yield text[i:i + size]
+
+    async def collect():
+        return "".join([piece async for piece in stream_filter(chunks())])
+
+    return asyncio.run(collect())
+
+
+def test_strip_mailing_instructions_stream_french():
+    answer = (
+        "Payez en ligne sur le site de la Ville. Libellez votre chèque à l'ordre de la Ville de "
+        "Kingston et postez-le à : C.P. 640, Kingston (Ontario) K7L 4X1\n\nLes taxes sont dues en février."
+    )
+    expected = "Payez en ligne sur le site de la Ville. \n\nLes taxes sont dues en février."
+    assert main._strip_mailing_instructions(answer) == expected
+    for size in (1, 3, 7, 64):
+        assert _stream_through(main._strip_mailing_instructions_stream, answer, size) == expected
+
+
+def _strip_marker(chunks):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect(verdict):
+        return "".join([piece async for piece in main._strip_relevance_marker(source(), verdict)])
+
+    verdict: dict = {}
+    return asyncio.run(collect(verdict)), verdict
+
+
+def test_strip_relevance_marker_split_across_chunks():
+    text, verdict = _strip_marker(["Permits cost $52.50. [", "[RE", "L:N", "O|off topic", "]]"])
+    assert text == "Permits cost $52.50. "
+    assert verdict["is_relevant"] is False and verdict["reason"] == "off topic"
+
+    text, verdict = _strip_marker(["Permits cost $52.50.\n[[REL:YES]", "]\nApply online."])
+    assert text == "Permits cost $52.50.\n\nApply online."
+    assert verdict["is_relevant"] is True
+
+
+def test_strip_relevance_marker_keeps_text_after_bad_marker():
+    text, verdict = _strip_marker(["Answer. [[REL:", "maybe]]", "\nMore answer."])
+    assert text == "Answer. \nMore answer."
+    assert verdict["is_relevant"] is True
+
+    text, _ = _strip_marker(["Answer. [[REL:YE"])
+    assert text == "Answer. "